@@ -0,0 +1,200 @@
+"""Microbenchmarks for the Seestar protocol hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.protocol                    # compare with the tracked baseline
+    python -m benchmarks.protocol --save-baseline    # record a new baseline
+    python -m benchmarks.protocol --payloads night.ndjson  # also time recorded traffic
+
+Each benchmark reports messages per second and the bytes allocated while handling one message,
+as the median of several runs of the whole suite, both when comparing and when recording.
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import click
+
+from smarttel.seestar.client import SeestarClient, ParsedEvent, U
+from smarttel.seestar.commands.common import CommandResponse
+from smarttel.seestar.commands.simple import GetViewState
+from smarttel.seestar.connection import SeestarConnection
+from smarttel.seestar.events import EVENT_MODELS, AnnotateResult, Annotation, parse_event
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+# Fields that make the synthetic events look like what the scope actually sends
+REALISTIC_FIELDS = {
+    "PiStatus": {"temp": 35.2, "charger_status": "Discharging", "charge_online": False, "battery_capacity": 87},
+    "Stack": {"state": "frame_complete", "lapse_ms": 10000, "stacked_frame": 120, "dropped_frame": 4,
+              "can_annotate": True, "frame_type": "light", "total_frame": 124, "route": ["View"]},
+    "Exposure": {"state": "downloading", "lapse_ms": 10000, "exp_ms": 10000.0, "route": ["View"]},
+    "ScopeGoto": {"state": "working", "lapse_ms": 2500, "cur_ra_dec": [10.68, 41.27], "dist_deg": 12.5},
+    "Annotate": {"page": "preview", "state": "complete",
+                 "result": AnnotateResult(image_size=[1080, 1920], image_id=7, annotations=[
+                     Annotation(type="star", pixelx=i * 10.0, pixely=i * 5.0, name=f"HD {i}", names=[f"HD {i}"])
+                     for i in range(50)])},
+}
+
+
+def synthetic_events() -> dict[str, bytes]:
+    """One raw frame for every event type."""
+    return {
+        name: (model(Timestamp="8923.123456", **REALISTIC_FIELDS.get(name, {})).model_dump_json() + "\r\n").encode()
+        for name, model in EVENT_MODELS.items()
+    }
+
+
+RESPONSE = (json.dumps({"jsonrpc": "2.0", "Timestamp": "8923.123456", "method": "get_view_state", "code": 0,
+                        "id": 42, "result": {"View": {"state": "working", "lapse_ms": 1000, "mode": "star",
+                                                      "cam_id": 0, "target_name": "M 31", "lp_filter": False,
+                                                      "gain": 80, "stage": "Stack"}}}) + "\r\n").encode()
+
+
+def allocated(operation: Callable[[], object]) -> int:
+    """Peak bytes allocated by one call of an operation."""
+    operation()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - before
+
+
+def rate(operation: Callable[[], object], rounds: int = 5, round_time: float = 0.1) -> float:
+    """Calls per second of an operation, best of several rounds to keep noise down."""
+    best = 0.0
+    batch = 50
+    for _ in range(rounds):
+        count = 0
+        started = time.perf_counter()
+        while (elapsed := time.perf_counter() - started) < round_time:
+            for _ in range(batch):
+                operation()
+            count += batch
+        best = max(best, count / elapsed)
+    return best
+
+
+def measure(operation: Callable[[], object]) -> tuple[float, int]:
+    """Messages per second and bytes allocated per message of an operation."""
+    return rate(operation), allocated(operation)
+
+
+def measure_async(operation: Callable[[], object], loop: asyncio.AbstractEventLoop,
+                  batch: int = 100) -> tuple[float, int]:
+    """`measure` for a coroutine function, batching calls to keep event loop overhead out of the rate."""
+    async def many():
+        for _ in range(batch):
+            await operation()
+
+    return (rate(lambda: loop.run_until_complete(many())) * batch,
+            allocated(lambda: loop.run_until_complete(operation())))
+
+
+def framing_benchmark(frames: list[bytes], loop: asyncio.AbstractEventLoop) -> tuple[float, int]:
+    """Frames per second through `SeestarConnection.read`."""
+    data = b"".join(frames)
+    connection = SeestarConnection(host="benchmark", port=0)
+
+    async def read_all():
+        connection.reader = asyncio.StreamReader(limit=connection.max_frame_size)
+        connection.reader.feed_data(data)
+        for _ in frames:
+            await connection.read()
+
+    frames_per_sec = rate(lambda: loop.run_until_complete(read_all())) * len(frames)
+    return frames_per_sec, allocated(lambda: loop.run_until_complete(read_all())) // len(frames)
+
+
+def run_benchmarks(recorded: list[bytes]) -> dict[str, dict[str, float]]:
+    """Run every benchmark, returning msgs_per_sec and alloc_bytes per benchmark."""
+    loop = asyncio.new_event_loop()
+    results = {}
+
+    def record(name: str, result: tuple[float, int]):
+        results[name] = {"msgs_per_sec": round(result[0]), "alloc_bytes": result[1]}
+
+    events = synthetic_events()
+    record("read/framing", framing_benchmark(list(events.values()) + [RESPONSE], loop))
+
+    for name, frame in events.items():
+        record(f"event/{name}/ParsedEvent", measure(lambda frame=frame: ParsedEvent(event=json.loads(frame))))
+        record(f"event/{name}/parse_event", measure(lambda frame=frame: parse_event(frame)))
+
+    record("response/CommandResponse", measure(lambda: CommandResponse[U].model_validate_json(RESPONSE)))
+    record("send/model_dump_json", measure(lambda: GetViewState(id=42).model_dump_json()))
+
+    client = SeestarClient("benchmark", 0)
+    for name in ("PiStatus", "Stack", "Annotate", "Exposure"):
+        record(f"handle_event/{name}", measure_async(lambda frame=events[name]: client._handle_event(frame), loop))
+
+    if recorded:
+        record("recorded/read/framing", framing_benchmark(recorded, loop))
+
+        async def handle_recorded():
+            for frame in recorded:
+                await client._handle_event(frame)
+
+        handled = rate(lambda: loop.run_until_complete(handle_recorded())) * len(recorded)
+        record("recorded/handle_event",
+               (handled, allocated(lambda: loop.run_until_complete(handle_recorded())) // len(recorded)))
+
+    loop.close()
+    return results
+
+
+def median_results(runs: list[dict[str, dict[str, float]]]) -> dict[str, dict[str, float]]:
+    """Per-benchmark median of several runs, as machine noise easily moves a single run by a third."""
+    return {
+        name: {key: round(statistics.median(run[name][key] for run in runs)) for key in result}
+        for name, result in runs[0].items()
+    }
+
+
+@click.command()
+@click.option("--payloads", type=click.Path(exists=True, dir_okay=False),
+              help="NDJSON file of recorded events to benchmark as well")
+@click.option("--save-baseline", is_flag=True, help="Record the results as the new baseline")
+@click.option("--tolerance", type=float, default=0.4, help="Allowed slowdown against the baseline (default: 0.4)")
+@click.option("--runs", type=click.IntRange(min=1), default=3, help="Runs to take the median of (default: 3)")
+def main(payloads, save_baseline, tolerance, runs):
+    """Benchmark the protocol hot paths."""
+    recorded = []
+    if payloads:
+        with open(payloads, "rb") as f:
+            recorded = [line for line in f if b'"Event"' in line]
+
+    results = median_results([run_benchmarks(recorded) for _ in range(runs)])
+    for name, result in results.items():
+        print(f"{name:<45} {result['msgs_per_sec']:>12,} msg/s {result['alloc_bytes']:>10,} B/msg")
+
+    if save_baseline:
+        BASELINE.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline to {BASELINE}")
+        return
+
+    if not BASELINE.exists():
+        return
+    baseline = json.loads(BASELINE.read_text())
+    regressions = [
+        f"{name}: {result['msgs_per_sec']:,} msg/s vs {baseline[name]['msgs_per_sec']:,} baseline"
+        for name, result in results.items()
+        if name in baseline and result["msgs_per_sec"] < baseline[name]["msgs_per_sec"] * (1 - tolerance)
+    ]
+    if regressions:
+        print("Regressions against the baseline:")
+        print("\n".join(regressions))
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
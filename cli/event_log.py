@@ -0,0 +1,129 @@
+"""Scrollback log of Seestar events for the TUI."""
+import collections
+import time
+from typing import NamedTuple
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+STATE_STYLES = {
+    'fail': Style(color="red", bold=True),
+    'cancel': Style(color="yellow"),
+    'complete': Style(color="green"),
+}
+
+
+class LogEntry(NamedTuple):
+    """Record of an event as received; only parsed when filtered on, and formatted when it scrolls into view."""
+    sequence: int
+    received: float
+    name: str
+    event: object  # as published, so possibly a `LazyEvent` not validated yet
+
+    @property
+    def state(self) -> str | None:
+        try:
+            return getattr(self.event, 'state', None)
+        except ValueError:
+            return None
+
+    def details(self, length: int) -> str:
+        """The event's fields as JSON, cut to `length` characters."""
+        try:
+            return self.event.model_dump_json(exclude={'Event', 'Timestamp'})[:length]
+        except ValueError as e:
+            return f"Invalid event: {e}"[:length]
+
+
+class EventLog(ScrollView):
+    """Virtualized, filterable log of the latest `capacity` events.
+
+    Entries live in a ring buffer, so memory stays flat however long the session. Events are kept
+    as received and only the rows on screen are ever formatted. While paused the view holds still
+    and new events are buffered until it resumes.
+    """
+
+    DEFAULT_CSS = """
+    EventLog {
+        height: 1fr;
+    }
+    """
+
+    def __init__(self, capacity: int = 50_000, details_length: int = 160, **kwargs):
+        super().__init__(**kwargs)
+        self.entries: collections.deque[LogEntry] = collections.deque(maxlen=capacity)
+        self.held: collections.deque[LogEntry] = collections.deque(maxlen=capacity)
+        self.details_length = details_length
+        self.sequence = 0
+        self.terms: list[str] = []
+        self.rows: collections.deque[int] = collections.deque()  # sequence numbers matching the filter
+        self.paused = False
+        self.followed_y = 0.0
+
+    def add(self, event) -> None:
+        """Record an event; call `sync` to show it."""
+        self.sequence += 1
+        entry = LogEntry(self.sequence, time.time(), event.Event, event)
+        if self.paused:
+            self.held.append(entry)
+        else:
+            self._append(entry)
+
+    def _append(self, entry: LogEntry) -> None:
+        self.entries.append(entry)
+        if self.matches(entry):
+            self.rows.append(entry.sequence)
+        # Forget rows whose entries dropped out of the ring buffer
+        first = self.entries[0].sequence
+        while self.rows and self.rows[0] < first:
+            self.rows.popleft()
+
+    def matches(self, entry: LogEntry) -> bool:
+        """Check an entry against the filter: every term must name its event type or state."""
+        return all(term == entry.name.lower() or term == (entry.state or "") for term in self.terms)
+
+    def set_filter(self, text: str) -> None:
+        """Only show events matching every word of the text, e.g. `AutoGoto fail`."""
+        self.terms = text.lower().split()
+        self.rows = collections.deque(entry.sequence for entry in self.entries if self.matches(entry))
+        self.sync(follow=True)
+
+    def set_paused(self, paused: bool) -> None:
+        """Freeze or resume the view, catching up on everything held meanwhile."""
+        self.paused = paused
+        if not paused:
+            while self.held:
+                self._append(self.held.popleft())
+            self.sync(follow=True)
+
+    def sync(self, follow: bool | None = None) -> None:
+        """Bring the view up to date, following the newest event if it was already at the bottom."""
+        if self.paused:
+            return
+        if follow is None:
+            # Still where the last sync left it, unless somebody scrolled away
+            follow = self.scroll_y >= self.max_scroll_y or self.scroll_y == self.followed_y
+        self.virtual_size = Size(self.size.width, len(self.rows))
+        if follow:
+            self.scroll_y = self.max_scroll_y
+            self.followed_y = self.scroll_y
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        """Format the row at the given line of the view."""
+        row = self.scroll_offset.y + y
+        if row >= len(self.rows) or not self.entries:
+            return Strip.blank(self.size.width)
+        entry = self.entries[self.rows[row] - self.entries[0].sequence]
+        received = time.strftime("%H:%M:%S", time.localtime(entry.received))
+        state = entry.state
+        segments = [
+            Segment(f"{received} "),
+            Segment(f"{entry.name:<18} ", Style(bold=True)),
+            Segment(f"{state or '':<9} ", STATE_STYLES.get(state)),
+            Segment(entry.details(self.details_length), Style(dim=True)),
+        ]
+        return Strip(segments).crop(self.scroll_offset.x, self.scroll_offset.x + self.size.width)
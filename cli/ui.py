@@ -1,14 +1,17 @@
 """UI utilities for the CLI."""
 import asyncio
 import json
-from contextlib import suppress
+import logging
 
 from textual.app import App, ComposeResult
 from textual.containers import HorizontalGroup, VerticalScroll, Container
-from textual.widgets import Header, Footer, Static, Button, DataTable
+from textual.widgets import Header, Footer, Static, Button, DataTable, Input
 from textual.screen import Screen
 
-from smarttel.seestar.client import SeestarClient
+from cli.event_log import EventLog
+from smarttel.seestar.client import ConnectionState, SeestarClient
+
+logger = logging.getLogger(__name__)
 
 
 class DevicePickerScreen(Screen):
@@ -37,12 +40,24 @@ class DevicePickerScreen(Screen):
         table.add_columns("IP Address", "Device Info")
         
         # Add devices to the table
-        for i, device in enumerate(self.devices):
-            try:
-                device_info = json.dumps(device['data'], indent=2)
-                table.add_row(device['address'], device_info[:50] + "..." if len(device_info) > 50 else device_info)
-            except (KeyError, TypeError):
-                table.add_row(device['address'], "Unknown device info")
+        for device in self.devices:
+            self._add_row(table, device)
+
+    def add_devices(self, devices) -> None:
+        """Add devices found after the picker was set up."""
+        self.devices.extend(devices)
+        if self.is_mounted:
+            table = self.query_one("#devices-table")
+            for device in devices:
+                self._add_row(table, device)
+
+    @staticmethod
+    def _add_row(table, device) -> None:
+        try:
+            device_info = json.dumps(device['data'], indent=2)
+            table.add_row(device['address'], device_info[:50] + "..." if len(device_info) > 50 else device_info)
+        except (KeyError, TypeError):
+            table.add_row(device['address'], "Unknown device info")
     
     def on_data_table_row_selected(self, event) -> None:
         """Handle row selection in the devices table."""
@@ -65,52 +80,75 @@ class MainUIScreen(Screen):
         """Create child widgets for the screen."""
         yield Header()
         yield Static(id="response")
-        yield Static(id="events")
+        yield Input(placeholder="Filter by event type and state, e.g. AutoGoto fail", id="filter")
+        yield EventLog(id="events")
         yield Footer()
     
     def on_mount(self) -> None:
         """Event handler for when the screen is mounted."""
-        print("MainUIScreen mounted")
+        logger.debug("MainUIScreen mounted")
         # Get the host and port from the parent app
         host = self.app.host
         port = self.app.port
+        self.app.event_log = self.query_one(EventLog)
+        self.app.event_log.focus()
         self.app.update_title()
         # Start the connection and monitoring task
         asyncio.create_task(self.app.runner())
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Filter the event log as the filter is typed."""
+        self.query_one(EventLog).set_filter(event.value)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Go back to the event log."""
+        self.query_one(EventLog).focus()
+
 
 class CombinedSeestarUI(App):
     """Combined Seestar UI with device picker and main interface."""
 
     CSS_PATH = "ui.tcss"
     TITLE = "SeestarUI"
-    BINDINGS = [("d", "toggle_dark", "Toggle dark mode")]
+    BINDINGS = [("d", "toggle_dark", "Toggle dark mode"),
+                ("p", "toggle_pause", "Pause/resume event log"),
+                ("slash", "filter", "Filter event log")]
 
     SCREENS = {
         "main_ui": MainUIScreen,
     }
 
-    def __init__(self, host=None, port=None, *args, **kwargs):
+    FRAME_INTERVAL = 0.05  # seconds between repaints at most
+
+    def __init__(self, host=None, port=None, *args, client=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.host = host
-        self.port = port
-        self.client = None
+        self.host = client.host if client else host
+        self.port = client.port if client else port
+        self.client = client
         self.events = []
         self.responses = []
         self.selected_device = None
+        self.event_count = 0
+        self.event_log = None
+        self.render_pending = False
+        self.last_render = 0.0
     
     def update_title(self, i=0) -> None:
         """Update the app title."""
-        if self.host and self.port:
+        if self.client or (self.host and self.port):
             self.title = f"SeestarUI ({self.host}:{self.port} {i})"
             if self.client:
                 self.sub_title = "Connected" if self.client.is_connected else "Disconnected"
+                if self.event_log is not None and self.event_log.paused:
+                    self.sub_title += " (event log paused)"
         else:
             self.title = "Seestar Device Picker"
     
     def on_mount(self) -> None:
         """Event handler called when the app is mounted."""
-        if self.host and self.port:
+        if self.client:
+            self.push_screen("main_ui")
+        elif self.host and self.port:
             # If we already have host and port, go directly to main UI
             self.init_client(self.host, self.port)
             self.push_screen("main_ui")
@@ -123,36 +161,77 @@ class CombinedSeestarUI(App):
         self.update_title()
     
     async def runner(self):
-        """Run the client connection and message handling."""
+        """Run the client connection and message handling.
+
+        Nothing polls: events, status changes and connection state changes each schedule a repaint,
+        and everything that happens within a frame interval is drawn by that one repaint.
+        """
         if not self.client:
             # Initialize client if it doesn't exist yet (from device picker)
             if self.selected_device:
                 self.init_client(self.selected_device['address'], 4700)
         
+        events = self.client.subscribe(maxsize=1000)
         await self.client.connect()
 
-        response_box = self.query_one("#response", Static)
-        event_box = self.query_one("#events", Static)
-        i = 0
-        while True:
-            i += 1
-            if self.client.is_connected:
-                try:
-                    msg = await self.client.recv()
-                    if msg is not None:
-                        print(f'----> UI msg Received: {msg}')
-                        response_box.update(str(msg))
-                    with suppress(IndexError):
-                        ev = self.client.recent_events.popleft()
-                        print(f'----> UI event Received: {ev}')
-                        event_box.update(str(ev))
-                except Exception as e:
-                    pass
-            self.update_title(i)
-            await asyncio.sleep(0.1)
+        watchers = [asyncio.create_task(self.watch_status()), asyncio.create_task(self.watch_state())]
+        self.schedule_render()
+        try:
+            async for ev in events:
+                self.event_count += 1
+                self.event_log.add(ev)
+                self.schedule_render()
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
 
         await self.client.disconnect()
+
+    async def watch_status(self):
+        """Repaint whenever the status changes."""
+        version = self.client.status.version
+        while True:
+            version = await self.client.status.wait_for_change(version)
+            self.schedule_render()
+
+    async def watch_state(self):
+        """Repaint whenever the connection state changes."""
+        while True:
+            state = self.client.state
+            await self.client.wait_for_state(*(other for other in ConnectionState if other != state))
+            self.schedule_render()
+
+    def schedule_render(self) -> None:
+        """Repaint once the current frame interval is over, unless a repaint is already due."""
+        if self.render_pending:
+            return
+        self.render_pending = True
+        loop = asyncio.get_running_loop()
+        loop.call_at(max(loop.time(), self.last_render + self.FRAME_INTERVAL), self.render_client)
+
+    def render_client(self) -> None:
+        """Draw the new events, status and connection state."""
+        self.render_pending = False
+        self.last_render = asyncio.get_running_loop().time()
+        screen = self.screen
+        if not isinstance(screen, MainUIScreen):
+            return
+        self.event_log.sync()
+        screen.query_one("#response", Static).update(
+            f"{self.client.state.value}  {self.client.status.model_dump_json(exclude={'annotate'})}")
+        self.update_title(self.event_count)
     
+    def action_toggle_pause(self) -> None:
+        """Pause or resume the event log."""
+        if self.event_log is not None:
+            self.event_log.set_paused(not self.event_log.paused)
+            self.update_title(self.event_count)
+
+    def action_filter(self) -> None:
+        """Focus the event log filter."""
+        if isinstance(self.screen, MainUIScreen):
+            self.screen.query_one("#filter", Input).focus()
+
     def action_toggle_dark(self) -> None:
         """Toggle dark mode."""
         self.theme = (
@@ -163,4 +242,9 @@ class CombinedSeestarUI(App):
         """Set up and display the device picker screen with the discovered devices."""
         picker_screen = DevicePickerScreen(devices)
         self.install_screen(picker_screen, name="device_picker")
-        self.push_screen("device_picker")
\ No newline at end of file
+        self.push_screen("device_picker")
+
+    def add_picker_devices(self, devices):
+        """Add devices discovered after the device picker was set up."""
+        if self.is_screen_installed("device_picker"):
+            self.get_screen("device_picker").add_devices(devices)
\ No newline at end of file
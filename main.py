@@ -1,21 +1,42 @@
 import asyncio
+import logging
 import sys
 import json
 import click
-import uvicorn
 from contextlib import suppress
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from pathlib import Path
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import Optional, AsyncGenerator
 
-from smarttel.seestar.client import SeestarClient
+from cli.ui import CombinedSeestarUI
+from smarttel.seestar.client import SeestarClient, ConnectionLostError, CommandTimeoutError, ConnectionState
 from smarttel.seestar.commands.common import CommandResponse
 from smarttel.seestar.commands.discovery import select_device_and_connect
 from smarttel.seestar.commands.simple import GetViewState
+from smarttel.seestar.events.fanout import EventFanout
+from smarttel.seestar.fleet import SeestarFleet
+from smarttel.seestar.journal import JournalReader, SessionJournal
+from smarttel.seestar.metrics import metric_lines
+from smarttel.seestar.plans import Plan
+from smarttel.seestar.plans.executor import DEFAULT_PLAN_DIR, PlanExecutor, PlanRun
+from smarttel.seestar.registry import DEFAULT_REGISTRY_PATH, DeviceRegistry
+from smarttel.seestar.replay import replay_client
+from smarttel.seestar.simulator import SeestarSimulator, SimulatorSettings
+from smarttel.seestar.telemetry import TelemetrySeries
+from smarttel.util.logs import logger_levels, set_logger_level, setup_logging
+
+logger = logging.getLogger("smarttel.server")
 
 
 async def runner(host: str, port: int):
-    client = SeestarClient(host, port, debug=True)
+    await run_client(SeestarClient(host, port, debug=True))
+
+
+async def run_client(client: SeestarClient):
+    """Connect a client and print its events until it disconnects."""
+    events = client.subscribe()
 
     await client.connect()
 
@@ -27,14 +48,8 @@ async def runner(host: str, port: int):
     #    print('')
     #    #await asyncio.sleep(5)
 
-    while client.is_connected:
-        msg = await client.recv()
-        if msg is not None:
-            print(f'----> Received: {msg}')
-        with suppress(IndexError):
-            event = client.recent_events.popleft()
-            print(f'----> Event: {event}')
-        await asyncio.sleep(0.1)
+    async for event in events:
+        print(f'----> Event: {event}')
 
     #msg: CommandResponse[dict] = await client.send_and_recv(GetWheelPosition())
     #print(f'Received: {msg}')
@@ -43,122 +58,515 @@ async def runner(host: str, port: int):
     await asyncio.sleep(1)
 
 
-def create_api_app(seestar_host: str, seestar_port: int):
-    """Create a FastAPI app for Seestar control."""
+def create_api_app(fleet: SeestarFleet, plan_dir: Path | None = None):
+    """Create a FastAPI app for controlling a fleet of Seestars.
+
+    The un-prefixed routes act on the first Seestar in the fleet. Plan progress is saved under
+    `plan_dir`, if given, and plans left unfinished there are resumed on startup.
+    """
     app = FastAPI(title="Seestar API", description="API for controlling Seestar devices")
-    
-    # Create a shared client instance
-    client = SeestarClient(seestar_host, seestar_port, debug=True)
-    
+    primary = next(iter(fleet.clients))
+    executors = {
+        name: PlanExecutor.load(client, plan_dir / f"{name}.json") if plan_dir else PlanExecutor(client=client)
+        for name, client in fleet.clients.items()
+    }
+
     @app.on_event("startup")
     async def startup():
-        """Connect to the Seestar on startup."""
-        try:
-            await client.connect()
-            print(f"Connected to Seestar at {seestar_host}:{seestar_port}")
-        except Exception as e:
-            print(f"Failed to connect to Seestar: {e}")
-    
+        """Connect to the Seestars on startup."""
+        results = await fleet.connect()
+        for name, error in results.items():
+            client = fleet.clients[name]
+            if error is None:
+                logger.info("Connected to Seestar %s at %s", name, client)
+            else:
+                logger.error("Failed to connect to Seestar %s at %s: %r", name, client, error)
+        for name, executor in executors.items():
+            if executor.resume():
+                logger.info("Resuming plan %s on Seestar %s", executor.run.plan.plan_name, name)
+
     @app.on_event("shutdown")
     async def shutdown():
-        """Disconnect from the Seestar on shutdown."""
-        await client.disconnect()
-        print("Disconnected from Seestar")
-    
+        """Disconnect from the Seestars on shutdown, leaving unfinished plans to resume next time."""
+        for executor in executors.values():
+            if executor.running:
+                executor.task.cancel()
+        await fleet.disconnect()
+        logger.info("Disconnected from Seestars")
+
+    def get_client(name: str) -> SeestarClient:
+        """Get a client by device name."""
+        client = fleet.clients.get(name)
+        if client is None:
+            raise HTTPException(status_code=404, detail=f"Unknown Seestar: {name}")
+        return client
+
+    async def view_state(client: SeestarClient):
+        """Get the current view state of a Seestar."""
+        if not client.is_connected:
+            raise HTTPException(status_code=503, detail="Not connected to Seestar")
+
+        try:
+            response = await client.send_and_recv(GetViewState())
+            return {"view_state": response}
+        except ConnectionLostError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except CommandTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
     @app.get("/")
     async def root():
         """Root endpoint with basic info."""
+        client = fleet.clients[primary]
         return {
             "status": "running",
             "seestar": {
-                "host": seestar_host,
-                "port": seestar_port,
+                "host": client.host,
+                "port": client.port,
                 "connected": client.is_connected
             }
         }
-    
+
     @app.get("/viewstate")
     async def get_view_state():
         """Get the current view state."""
-        if not client.is_connected:
+        return await view_state(fleet.clients[primary])
+
+    @app.get("/status")
+    async def get_status():
+        """Get the status of every Seestar."""
+        return fleet.status()
+
+    @app.get("/devices")
+    async def get_devices():
+        """List the Seestars in the fleet."""
+        return {
+            name: {"host": client.host, "port": client.port, "connected": client.is_connected}
+            for name, client in fleet.clients.items()
+        }
+
+    @app.get("/devices/viewstate")
+    async def get_devices_view_state(names: str | None = None, timeout: float | None = None):
+        """Get the view state of several Seestars at once (comma separated names, default all)."""
+        selected = names.split(",") if names else None
+        for name in selected or ():
+            get_client(name)
+        results = await fleet.send_and_recv(GetViewState(), selected, timeout)
+        return {
+            name: {"view_state": result} if not isinstance(result, BaseException)
+            else {"error": repr(result)}
+            for name, result in results.items()
+        }
+
+    @app.get("/devices/{name}")
+    async def get_device(name: str):
+        """Get the status of a Seestar."""
+        get_client(name)
+        return fleet.status()[name]
+
+    @app.get("/devices/{name}/viewstate")
+    async def get_device_view_state(name: str):
+        """Get the current view state of a Seestar."""
+        return await view_state(get_client(name))
+
+    @app.get("/stacking")
+    async def get_stacking():
+        """Get the progress of stacking."""
+        return fleet.clients[primary].status.stacking
+
+    @app.put("/stacking/target")
+    async def put_stacking_target(frames: int | None = None, integration: float | None = None):
+        """Set the frame count and/or integration seconds to estimate the time to; leave out to clear."""
+        client = fleet.clients[primary]
+        client.set_stacking_target(frames, integration)
+        return client.status.stacking
+
+    @app.get("/devices/{name}/stacking")
+    async def get_device_stacking(name: str):
+        """Get the progress of stacking on a Seestar."""
+        return get_client(name).status.stacking
+
+    @app.put("/devices/{name}/stacking/target")
+    async def put_device_stacking_target(name: str, frames: int | None = None, integration: float | None = None):
+        """Set the frame count and/or integration seconds a Seestar's stacking is estimated to; leave out to clear."""
+        client = get_client(name)
+        client.set_stacking_target(frames, integration)
+        return client.status.stacking
+
+    def get_executor(name: str) -> PlanExecutor:
+        """Get the plan executor of a Seestar by device name."""
+        get_client(name)
+        return executors[name]
+
+    def start_plan(executor: PlanExecutor, plan: Plan) -> PlanRun:
+        """Start running a plan on a Seestar."""
+        if not executor.client.is_connected:
             raise HTTPException(status_code=503, detail="Not connected to Seestar")
-        
         try:
-            response = await client.send_and_recv(GetViewState())
-            return {"view_state": response}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
-    
-    async def status_stream_generator() -> AsyncGenerator[str, None]:
-        """Generate a stream of client status updates."""
+            return executor.start(plan)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    async def cancel_plan(executor: PlanExecutor) -> PlanRun | None:
+        """Stop running the plan on a Seestar."""
         try:
-            while True:
-                # Create a status object with current client information
-                status = {
-                    "timestamp": asyncio.get_event_loop().time(),
-                    "connected": client.is_connected,
-                    "host": seestar_host,
-                    "port": seestar_port,
-                    "status": client.status.model_dump()
+            await executor.cancel()
+        except (ConnectionLostError, CommandTimeoutError) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return executor.run
+
+    @app.get("/plan")
+    async def get_plan():
+        """Get the plan being run, with the progress through it."""
+        return executors[primary].run
+
+    @app.post("/plan")
+    async def post_plan(plan: Plan):
+        """Run a plan, in the Seestar's own plan format."""
+        return start_plan(executors[primary], plan)
+
+    @app.delete("/plan")
+    async def delete_plan():
+        """Stop running the plan."""
+        return await cancel_plan(executors[primary])
+
+    @app.get("/devices/{name}/plan")
+    async def get_device_plan(name: str):
+        """Get the plan being run on a Seestar, with the progress through it."""
+        return get_executor(name).run
+
+    @app.post("/devices/{name}/plan")
+    async def post_device_plan(name: str, plan: Plan):
+        """Run a plan on a Seestar, in the Seestar's own plan format."""
+        return start_plan(get_executor(name), plan)
+
+    @app.delete("/devices/{name}/plan")
+    async def delete_device_plan(name: str):
+        """Stop running the plan on a Seestar."""
+        return await cancel_plan(get_executor(name))
+
+    def telemetry(client: SeestarClient, metric: str, start: float | None, end: float | None,
+                  resolution: float) -> TelemetrySeries:
+        """Get the history of a telemetry metric of a Seestar."""
+        try:
+            return client.telemetry.query(metric, start, end, resolution)
+        except KeyError:
+            raise HTTPException(status_code=404,
+                                detail=f"Unknown metric: {metric} (one of {', '.join(client.telemetry.metrics)})")
+
+    @app.get("/telemetry/{metric}")
+    async def get_telemetry(metric: str, start: float | None = None, end: float | None = None,
+                            resolution: float = 0.0):
+        """Get a telemetry metric from `start` to `end` (Unix time) in buckets of at least `resolution` seconds."""
+        return telemetry(fleet.clients[primary], metric, start, end, resolution)
+
+    @app.get("/devices/{name}/telemetry/{metric}")
+    async def get_device_telemetry(name: str, metric: str, start: float | None = None, end: float | None = None,
+                                   resolution: float = 0.0):
+        """Get a telemetry metric of a Seestar from `start` to `end` (Unix time) in buckets of at least `resolution` seconds."""
+        return telemetry(get_client(name), metric, start, end, resolution)
+
+    async def status_stream_generator(client: SeestarClient, since: int | None = None,
+                                      coalesce: float = 0.1,
+                                      keepalive: float = 15.0) -> AsyncGenerator[str, None]:
+        """Generate a stream of client status changes.
+
+        The stream opens with a full `snapshot` event, or with a `delta` when resuming from a version
+        the client has already seen, then sends a `delta` of just the changed fields whenever the
+        status changes. Changes within `coalesce` seconds of each other go out as one delta, and a
+        comment is sent every `keepalive` seconds of quiet so proxies keep the stream open. Every
+        event carries `epoch:version` as its id, so a reconnecting browser resumes where it was; the
+        epoch tells a status from a restarted server apart, which gets a fresh snapshot instead.
+        """
+        loop = asyncio.get_running_loop()
+        status = client.status
+        try:
+            version = status.version
+            connected = client.is_connected
+            if since is None or since > version:
+                snapshot = {
+                    "timestamp": loop.time(),
+                    "connected": connected,
+                    "host": client.host,
+                    "port": client.port,
+                    "status": status.model_dump(mode='json')
                 }
-                
-                # If connected, add recent events and messages
-                # if client.is_connected:
-                #     status["recent_events"] = [str(event) for event in list(client.recent_events)]
-                #
-                #     # Try to get current view state
-                #     try:
-                #         view_state = await client.send_and_recv(GetViewState())
-                #         status["view_state"] = str(view_state)
-                #     except Exception as e:
-                #         status["view_state_error"] = str(e)
-                
-                # Send the status as a Server-Sent Event
-                yield f"data: {json.dumps(status)}\n\n"
-                
-                # Wait for 5 seconds before sending next update
-                await asyncio.sleep(5)
+                yield f"id: {status.epoch}:{version}\nevent: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            else:
+                delta = {"timestamp": loop.time(), "connected": connected, "changes": status.changes_since(since)}
+                yield f"id: {status.epoch}:{version}\nevent: delta\ndata: {json.dumps(delta)}\n\n"
+
+            while True:
+                # Woken by a status change or by the link going down or coming back
+                states = [ConnectionState.CONNECTED]
+                if connected:
+                    states = [state for state in ConnectionState if state != ConnectionState.CONNECTED]
+                waits = {asyncio.ensure_future(status.wait_for_change(version)),
+                         asyncio.ensure_future(client.wait_for_state(*states))}
+                try:
+                    done, _ = await asyncio.wait(waits, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for wait in waits:
+                        wait.cancel()
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                if status.version != version:
+                    # Let a burst of changes settle into a single delta
+                    await asyncio.sleep(coalesce)
+                changes = status.changes_since(version)
+                version = status.version
+                connected = client.is_connected
+                delta = {"timestamp": loop.time(), "connected": connected, "changes": changes}
+                yield f"id: {status.epoch}:{version}\nevent: delta\ndata: {json.dumps(delta)}\n\n"
         except asyncio.CancelledError:
             # Handle client disconnection gracefully
             yield f"data: {json.dumps({'status': 'stream_closed'})}\n\n"
-    
+
+    def resume_version(client: SeestarClient, request: Request, since: str | None) -> int | None:
+        """Status version a stream resumes from, from the query or the browser's Last-Event-ID.
+
+        Both are `epoch:version`; None if there is none or it is from another status history.
+        """
+        last_event_id = since if since is not None else request.headers.get("last-event-id")
+        epoch, _, version = (last_event_id or "").partition(":")
+        if epoch != client.status.epoch or not version.isdigit():
+            return None
+        return int(version)
+
     @app.get("/status/stream")
-    async def stream_status():
-        """Stream client status updates every 5 seconds."""
+    async def stream_status(request: Request, since: str | None = None):
+        """Stream client status changes as they happen, resuming after `since` (an event id) if given."""
+        client = fleet.clients[primary]
+        return StreamingResponse(
+            status_stream_generator(client, resume_version(client, request, since)),
+            media_type="text/event-stream"
+        )
+
+    @app.get("/devices/{name}/status/stream")
+    async def stream_device_status(name: str, request: Request, since: str | None = None):
+        """Stream status changes of a Seestar as they happen, resuming after `since` (an event id) if given."""
+        client = get_client(name)
         return StreamingResponse(
-            status_stream_generator(),
+            status_stream_generator(client, resume_version(client, request, since)),
             media_type="text/event-stream"
         )
-    
+
+    @app.get("/logging")
+    async def get_logging():
+        """Current log levels, by logger name."""
+        return logger_levels()
+
+    @app.put("/logging/{name}")
+    async def put_logging(name: str, level: str):
+        """Change the level of a logger at runtime, e.g. `smarttel.seestar.client.traffic` to DEBUG."""
+        try:
+            set_logger_level(name, level)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {name: level.upper()}
+
+    fanouts: dict[str, EventFanout] = {}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics():
+        """Metrics of every Seestar and of the event fan-out, in the Prometheus text format."""
+        lines = fleet.metrics()
+        lines += metric_lines(
+            "seestar_websocket_viewers", "gauge", "WebSocket event viewers.",
+            (({"device": name}, len(fanout.viewers.subscriptions)) for name, fanout in fanouts.items()))
+        lines += metric_lines(
+            "seestar_websocket_events_encoded_total", "counter", "Events encoded for WebSocket viewers.",
+            (({"device": name}, fanout.encoded) for name, fanout in fanouts.items()))
+        return "\n".join(lines) + "\n"
+
+
+    async def stream_events(websocket: WebSocket, name: str, events: str | None, policy: str,
+                            maxsize: int, send_timeout: float):
+        """Push the events of a Seestar to a WebSocket until either side goes away.
+
+        All viewers of a Seestar share one subscription to it and each event is encoded once for
+        all of them. A viewer that can't take a message within `send_timeout` seconds is cut off.
+        """
+        if name not in fleet.clients:
+            await websocket.close(code=1008, reason=f"Unknown Seestar: {name}")
+            return
+        if name not in fanouts:
+            fanouts[name] = EventFanout(upstream=fleet.clients[name].event_bus)
+        fanout = fanouts[name]
+        try:
+            viewer = fanout.subscribe(set(events.split(",")) if events else None, maxsize=maxsize, policy=policy)
+        except ValueError as e:
+            await websocket.close(code=1008, reason=str(e))
+            return
+
+        await websocket.accept()
+
+        async def watch_close():
+            # Viewers only listen, so anything but a disconnect is ignored
+            with suppress(WebSocketDisconnect):
+                while True:
+                    await websocket.receive_text()
+            viewer.close()
+
+        watcher = asyncio.create_task(watch_close())
+        try:
+            async for event in viewer:
+                await asyncio.wait_for(websocket.send_text(event.json), send_timeout)
+            if watcher.done():
+                return
+            await websocket.close()
+        except TimeoutError:
+            await websocket.close(code=1008, reason="Too slow")
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            watcher.cancel()
+            fanout.unsubscribe(viewer)
+
+    @app.websocket("/events/ws")
+    async def events_websocket(websocket: WebSocket, events: str | None = None, policy: str = 'conflate',
+                               maxsize: int = 100, send_timeout: float = 5.0):
+        """Stream events as JSON messages, optionally only a comma separated list of event types."""
+        await stream_events(websocket, primary, events, policy, maxsize, send_timeout)
+
+    @app.websocket("/devices/{name}/events/ws")
+    async def device_events_websocket(websocket: WebSocket, name: str, events: str | None = None,
+                                      policy: str = 'conflate', maxsize: int = 100, send_timeout: float = 5.0):
+        """Stream events of a Seestar as JSON messages, optionally only a comma separated list of event types."""
+        await stream_events(websocket, name, events, policy, maxsize, send_timeout)
+
     return app
 
 
+def parse_device(spec: str, default_port: int) -> tuple[str, str, int]:
+    """Parse a `[name=]host[:port]` device spec into name, host and port."""
+    name, _, address = spec.rpartition("=")
+    host, _, port = address.partition(":")
+    return name or host, host, int(port) if port else default_port
+
+
 @click.group()
-def main():
+@click.option("--log-level", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
+              default="INFO", help="Log level (default: INFO)")
+@click.option("--log-json", is_flag=True, help="Log one JSON object per line")
+@click.option("--log-file", type=click.Path(dir_okay=False), default=None,
+              help="Log to this file instead of stderr; the console UI only logs when this is given")
+@click.pass_context
+def main(ctx, log_level, log_json, log_file):
     """Seestar commands."""
-    pass
+    ctx.obj = {"log_file": log_file}
+    handler = logging.FileHandler(log_file) if log_file else None
+    setup_logging(log_level.upper(), handler, as_json=log_json)
+
+
+def quiet_logging_for_tui(ctx: click.Context):
+    """Stop logging to the terminal while a TUI owns it, unless logging to a file."""
+    if ctx.obj["log_file"] is None:
+        setup_logging(logging.getLogger().level, logging.NullHandler())
 
 
 @main.command("console")
 @click.option("--host", help="Seestar host address")
 @click.option("--port", type=int, default=4700, help="Seestar port (default: 4700)")
-def console(host, port):
+@click.option("--serial", help="Serial number of the Seestar to discover and connect to")
+@click.option("--registry", type=click.Path(dir_okay=False), default=str(DEFAULT_REGISTRY_PATH),
+              help=f"Registry of known Seestars (default: {DEFAULT_REGISTRY_PATH})")
+@click.pass_context
+def console(ctx, host, port, serial, registry):
     """Connect to a Seestar device, with optional device discovery."""
-    asyncio.run(select_device_and_connect(host, port))
+    quiet_logging_for_tui(ctx)
+    asyncio.run(select_device_and_connect(host, port, serial, DeviceRegistry.load(Path(registry))))
 
 
 @main.command("server")
 @click.option("--server-port", type=int, default=8000, help="Port for the API server (default: 8000)")
-@click.option("--seestar-host", required=True, help="Seestar device host address")
-@click.option("--seestar-port", type=int, default=4700, help="Seestar device port (default: 4700)")
-def server(server_port, seestar_host, seestar_port):
-    """Start a FastAPI server for controlling a Seestar device."""
+@click.option("--seestar-host", multiple=True,
+              help="Seestar device as [name=]host[:port]; repeat for several devices "
+                   "(default: the reachable Seestars of the registry)")
+@click.option("--seestar-port", type=int, default=4700, help="Default Seestar device port (default: 4700)")
+@click.option("--journal", type=click.Path(file_okay=False), default=None,
+              help="Journal all Seestar traffic under this directory")
+@click.option("--registry", type=click.Path(dir_okay=False), default=str(DEFAULT_REGISTRY_PATH),
+              help=f"Registry of known Seestars (default: {DEFAULT_REGISTRY_PATH})")
+@click.option("--plan-dir", type=click.Path(file_okay=False), default=str(DEFAULT_PLAN_DIR),
+              help=f"Where plan progress is saved, to resume after a restart (default: {DEFAULT_PLAN_DIR})")
+def server(server_port, seestar_host, seestar_port, journal, registry, plan_dir):
+    """Start a FastAPI server for controlling Seestar devices."""
     print(f"Starting Seestar API server on port {server_port}")
-    print(f"Connecting to Seestar at {seestar_host}:{seestar_port}")
-    
-    app = create_api_app(seestar_host, seestar_port)
+
+    devices = [parse_device(spec, seestar_port) for spec in seestar_host]
+    if not devices:
+        reachable = asyncio.run(DeviceRegistry.load(Path(registry)).probe())
+        devices = [(device.key, device.address, device.port) for device in reachable]
+        if not devices:
+            raise click.UsageError("No reachable Seestar in the registry; give --seestar-host")
+
+    fleet = SeestarFleet()
+    for name, host, port in devices:
+        print(f"Connecting to Seestar {name} at {host}:{port}")
+        client = fleet.add(name, host, port, debug=True)
+        if journal:
+            client.journal = SessionJournal(directory=Path(journal) / name)
+
+    app = create_api_app(fleet, Path(plan_dir))
     uvicorn.run(app, host="0.0.0.0", port=server_port)
 
 
+@main.command("journal")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--start", type=click.DateTime(), default=None, help="Only records from this local time")
+@click.option("--end", type=click.DateTime(), default=None, help="Only records until this local time")
+@click.option("--event", "events", multiple=True, help="Only this event type; repeat for several")
+@click.option("--direction", type=click.Choice(['i', 'o']), default=None,
+              help="Only traffic from (i) or to (o) the Seestar")
+def journal(directory, start, end, events, direction):
+    """Print recorded traffic from a journal as NDJSON."""
+    reader = JournalReader(directory=Path(directory))
+    records = reader.read(start=start.timestamp() if start else None, end=end.timestamp() if end else None,
+                          events=set(events) if events else None, direction=direction)
+    for record in records:
+        sys.stdout.buffer.write(record.raw + b"\n")
+
+
+@main.command("replay")
+@click.argument("recording", type=click.Path(exists=True))
+@click.option("--speed", type=float, default=1.0, help="Playback speed; 0 plays back as fast as possible (default: 1)")
+@click.option("--server-port", type=int, default=None, help="Serve the API on this port instead of printing events")
+@click.option("--tui", is_flag=True, help="Show the replay in the console UI")
+@click.pass_context
+def replay(ctx, recording, speed, server_port, tui):
+    """Replay a recorded session (journal directory or NDJSON capture) through the client."""
+    client = replay_client(Path(recording), speed=speed or None, debug=True)
+    if tui:
+        quiet_logging_for_tui(ctx)
+        asyncio.run(CombinedSeestarUI(client=client).run_async())
+    elif server_port is not None:
+        fleet = SeestarFleet(clients={"replay": client})
+        uvicorn.run(create_api_app(fleet), host="0.0.0.0", port=server_port)
+    else:
+        asyncio.run(run_client(client))
+
+
+@main.command("simulator")
+@click.option("--port", type=int, default=4700, help="Port to listen on (default: 4700)")
+@click.option("--discovery-port", type=int, default=4720, help="UDP discovery port (default: 4720)")
+@click.option("--latency", type=float, default=0.0, help="Seconds added to every response")
+@click.option("--jitter", type=float, default=0.0, help="Up to this many extra seconds per response")
+@click.option("--exposure", type=float, default=None, help="Seconds per stacked frame (default: exposure setting)")
+@click.option("--flood-rate", type=float, default=0.0, help="Extra events per second")
+@click.option("--disconnect-interval", type=float, default=None, help="Mean seconds between dropped connections")
+def simulator(port, discovery_port, latency, jitter, exposure, flood_rate, disconnect_interval):
+    """Run a simulated Seestar for testing without a telescope."""
+    settings = SimulatorSettings(port=port, discovery_port=discovery_port, latency=latency, jitter=jitter,
+                                 exposure_s=exposure, flood_rate=flood_rate,
+                                 disconnect_interval=disconnect_interval)
+    print(f"Simulating a Seestar on port {port}")
+    with suppress(KeyboardInterrupt):
+        asyncio.run(SeestarSimulator(settings=settings).serve_forever())
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Cache of responses to read-only Seestar commands."""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from smarttel.seestar.commands.common import CommandResponse, QueryCommand
+
+
+class ResponseCache(BaseModel, arbitrary_types_allowed=True):
+    """Responses to cacheable `QueryCommand`s, keyed by method and parameters.
+
+    A response is reused until its command's `cache_ttl` runs out or one of its `invalidated_by`
+    events arrives. Concurrent misses for the same command share a single request to the Seestar.
+    Cached responses are shared between callers and must not be modified.
+    """
+    entries: dict[str, tuple[float, CommandResponse]] = {}  # key -> (expiry, response)
+    in_flight: dict[str, asyncio.Future] = {}
+    keys_by_event: dict[str, set[str]] = {}
+    generations: dict[str, int] = {}  # bumped on invalidation, so in-flight responses aren't cached stale
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # misses that joined a request already in flight
+
+    @staticmethod
+    def cacheable(command) -> bool:
+        """Check if responses to a command may be cached."""
+        return isinstance(command, QueryCommand) and command.cache_ttl is not None
+
+    async def get(self, command: QueryCommand,
+                  fetch: Callable[[], Awaitable[CommandResponse | None]]) -> CommandResponse | None:
+        """Cached response to a command, fetching it if it is missing or stale."""
+        key = command.model_dump_json(exclude={'id'})
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self.in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            for event in command.invalidated_by:
+                self.keys_by_event.setdefault(event, set()).add(key)
+            task = asyncio.ensure_future(self._fetch(key, command, fetch))
+            self.in_flight[key] = task
+        else:
+            self.coalesced += 1
+        # One caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, command: QueryCommand,
+                     fetch: Callable[[], Awaitable[CommandResponse | None]]) -> CommandResponse | None:
+        generation = self.generations.get(key, 0)
+        try:
+            response = await fetch()
+        finally:
+            self.in_flight.pop(key, None)
+        if response is not None and response.code == 0 and self.generations.get(key, 0) == generation:
+            self.entries[key] = (time.monotonic() + command.cache_ttl, response)
+        return response
+
+    def invalidate(self, event_name: str):
+        """Drop the responses made stale by an event."""
+        for key in self.keys_by_event.get(event_name, ()):
+            self.entries.pop(key, None)
+            self.generations[key] = self.generations.get(key, 0) + 1
+
+    def clear(self):
+        """Drop every response, e.g. when a new session starts."""
+        self.entries.clear()
+        for key in self.in_flight:
+            self.generations[key] = self.generations.get(key, 0) + 1
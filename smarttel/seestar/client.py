@@ -1,21 +1,43 @@
 import asyncio
 import collections
 import json
+import random
+import time
+import uuid
+from enum import Enum
 import logging
-from typing import TypeVar, Literal
+from typing import AsyncIterator, Awaitable, TypeVar, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr
 
-from smarttel.seestar.commands.common import CommandResponse
+from smarttel.seestar.cache import ResponseCache
+from smarttel.seestar.commands.common import BaseCommand, CommandResponse
 from smarttel.seestar.commands.simple import GetTime, GetDeviceState, GetViewState
-from smarttel.seestar.connection import SeestarConnection
-from smarttel.seestar.events import EventTypes, PiStatusEvent, AnnotateResult
+from smarttel.seestar.connection import SeestarConnection, frame_kind
+from smarttel.seestar.events import (EventTypes, PiStatusEvent, AnnotateResult, BaseEvent, EVENT_MODELS, LazyEvent,
+                                     event_name, parse_event)
+from smarttel.seestar.events.bus import EventBus, OverflowPolicy, Subscription
+from smarttel.seestar.journal import SessionJournal
+from smarttel.seestar.metrics import ClientMetrics
+from smarttel.seestar.stacking import StackingProgress, StackingTracker, exposure_ms
+from smarttel.seestar.telemetry import TelemetryStore
+
+logger = logging.getLogger(__name__)
+traffic_logger = logging.getLogger(f"{__name__}.traffic")
+"""Every message to and from clients with `debug` set, at DEBUG level."""
 
 U = TypeVar("U")
 
+STATUS_EVENTS = frozenset({'PiStatus', 'Stack', 'Annotate', 'BatchStack'})
+"""Events that update `SeestarStatus` and are therefore always validated on arrival."""
+
 
 class SeestarStatus(BaseModel):
-    """Seestar status."""
+    """Seestar status.
+
+    Every field assignment that changes a value bumps `version`, so watchers can wait for changes
+    and ask for just the fields that changed since the version they last saw.
+    """
     temp: float | None = None
     charger_status: Literal['Discharging', 'Charging', 'Full'] | None = None
     charge_online: bool | None = None
@@ -24,6 +46,51 @@ class SeestarStatus(BaseModel):
     dropped_frame: int = 0
     target_name: str = ""
     annotate: AnnotateResult | None = None
+    stacking: StackingProgress = StackingProgress()  # derived from the events, so kept across reconnects
+    _epoch: str = PrivateAttr(default_factory=lambda: uuid.uuid4().hex[:12])
+    _version: int = PrivateAttr(0)
+    _changed_at: dict[str, int] = PrivateAttr(default_factory=dict)
+    _waiters: list[asyncio.Future] = PrivateAttr(default_factory=list)
+
+    def __setattr__(self, name, value):
+        fields = self.__dict__
+        if name in fields:
+            if fields[name] == value:
+                return
+            # Plain field assignment, as pydantic itself does without validate_assignment
+            fields[name] = value
+            self.__pydantic_fields_set__.add(name)
+            self._version += 1
+            self._changed_at[name] = self._version
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(self._version)
+        else:
+            super().__setattr__(name, value)
+
+    @property
+    def version(self) -> int:
+        """Number of changes so far."""
+        return self._version
+
+    @property
+    def epoch(self) -> str:
+        """Identifies this status object, so versions from another process or client aren't mistaken for its own."""
+        return self._epoch
+
+    def changes_since(self, version: int) -> dict:
+        """JSON-ready values of the fields that changed after the given version."""
+        changed = {name for name, at in self._changed_at.items() if at > version}
+        return self.model_dump(mode='json', include=changed) if changed else {}
+
+    async def wait_for_change(self, version: int) -> int:
+        """Wait until the status is newer than the given version, returning the new version."""
+        while self._version <= version:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        return self._version
 
     def reset(self):
         self.temp = None
@@ -36,6 +103,46 @@ class SeestarStatus(BaseModel):
         self.annotate = None
 
 
+class HeartbeatStats(BaseModel):
+    """Round trip times and misses of the heartbeat."""
+    rtts: collections.deque = Field(default_factory=lambda: collections.deque(maxlen=60))
+    missed: int = 0
+    total_missed: int = 0
+
+    def record(self, rtt: float):
+        """Record a heartbeat that was answered in time."""
+        self.rtts.append(rtt)
+        self.missed = 0
+
+    def summary(self) -> dict:
+        """Latency summary over the rolling window, in seconds."""
+        rtts = self.rtts
+        return {
+            "last_rtt": rtts[-1] if rtts else None,
+            "mean_rtt": sum(rtts) / len(rtts) if rtts else None,
+            "min_rtt": min(rtts) if rtts else None,
+            "max_rtt": max(rtts) if rtts else None,
+            "missed": self.missed,
+            "total_missed": self.total_missed,
+        }
+
+
+class ConnectionState(str, Enum):
+    """State of the connection with Seestar."""
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    RECONNECTING = "reconnecting"
+
+
+class ConnectionLostError(ConnectionError):
+    """The connection with Seestar dropped before a command was answered."""
+
+
+class CommandTimeoutError(TimeoutError):
+    """Seestar did not answer a command in time."""
+
+
 class ParsedEvent(BaseModel):
     """Parsed event."""
     event: EventTypes
@@ -48,10 +155,28 @@ class SeestarClient(BaseModel, arbitrary_types_allowed=True):
     connection: SeestarConnection | None = None
     id: int = 1
     is_connected: bool = False
+    state: ConnectionState = ConnectionState.DISCONNECTED
+    state_waiters: list[asyncio.Future] = []
+    auto_reconnect: bool = True
+    reconnect_delay: float = 1.0
+    reconnect_max_delay: float = 60.0
+    reconnect_task: asyncio.Task | None = None
+    last_traffic: float = 0.0
+    heartbeat_interval: float = 5.0  # idle time before pinging
+    heartbeat_timeout: float = 5.0
+    heartbeat_max_missed: int = 3
+    heartbeat: HeartbeatStats = HeartbeatStats()
+    journal: SessionJournal | None = None
     debug: bool = False
-    status: SeestarStatus = SeestarStatus()
+    status: SeestarStatus = Field(default_factory=SeestarStatus)
     background_task: asyncio.Task | None = None
-    recent_events: collections.deque = collections.deque(maxlen=5)
+    reader_task: asyncio.Task | None = None
+    pending: dict[int, asyncio.Future] = {}
+    event_bus: EventBus = EventBus()
+    cache: ResponseCache = ResponseCache()
+    metrics: ClientMetrics = ClientMetrics()
+    telemetry: TelemetryStore = Field(default_factory=TelemetryStore)
+    stacking: StackingTracker = StackingTracker()
 
     def __init__(self, host: str, port: int, debug=False):
         super().__init__(host=host, port=port)
@@ -60,26 +185,52 @@ class SeestarClient(BaseModel, arbitrary_types_allowed=True):
         self.connection = SeestarConnection(host=host, port=port)
 
     async def _heartbeat(self):
-        # todo : properly check if is_connected!!
-        await asyncio.sleep(5)
+        """Ping Seestar once the link has been idle, declaring it dead after too many missed deadlines."""
         while True:
-            if self.is_connected:
-                print(f"Pinging {self}")
-                _ = await self.send_and_recv(GetTime())
-            # todo : decrease sleep time to 1 second and, instead, check next heartbeat time
-            await asyncio.sleep(5)
+            if not self.is_connected:
+                await self.wait_for_state(ConnectionState.CONNECTED)
+                continue
+            idle = time.monotonic() - self.last_traffic
+            if idle < self.heartbeat_interval:
+                await asyncio.sleep(self.heartbeat_interval - idle)
+                continue
+
+            if self.debug:
+                traffic_logger.debug("Pinging", extra={"device": self})
+            sent = time.monotonic()
+            try:
+                await self.send_and_recv(GetTime(), timeout=self.heartbeat_timeout)
+            except ConnectionLostError:
+                continue
+            except CommandTimeoutError:
+                self.heartbeat.missed += 1
+                self.heartbeat.total_missed += 1
+                logger.warning("Missed heartbeat %d/%d from %s", self.heartbeat.missed, self.heartbeat_max_missed,
+                               self, extra={"device": self})
+                if self.heartbeat.missed >= self.heartbeat_max_missed:
+                    self.heartbeat.missed = 0
+                    await self._connection_lost()
+                continue
+            except Exception as e:
+                # Dead-link detection must outlive anything unexpected
+                logger.exception("Error while pinging %s: %r", self, e, extra={"device": self})
+                self.last_traffic = time.monotonic()
+                continue
+            self.heartbeat.record(time.monotonic() - sent)
 
     def process_view_state(self, response: CommandResponse[dict]):
         """Process view state."""
-        print(f"Processing view state from {self}: {response}")
+        if self.debug:
+            traffic_logger.debug("View state", extra={"device": self, "payload": response})
         if response.result is not None:
             self.status.target_name = response.result['View']['target_name']
         else:
-            print(f"Error while processing view state from {self}: {response}")
+            logger.error("Error while processing view state from %s", self, extra={"device": self, "payload": response})
 
     def process_device_state(self, response: CommandResponse[dict]):
         """Process device state."""
-        print(f"Processing device state from {self}: {response}")
+        if self.debug:
+            traffic_logger.debug("Device state", extra={"device": self, "payload": response})
         if response.result is not None:
             pi_status = PiStatusEvent(**response.result['pi_status'], Timestamp=response.Timestamp)
             self.status.temp = pi_status.temp
@@ -87,107 +238,383 @@ class SeestarClient(BaseModel, arbitrary_types_allowed=True):
             self.status.charge_online = pi_status.charge_online
             self.status.battery_capacity = pi_status.battery_capacity
         else:
-            print(f"Error while processing device state from {self}: {response}")
+            logger.error("Error while processing device state from %s", self,
+                         extra={"device": self, "payload": response})
+
+    def _set_state(self, state: ConnectionState):
+        """Change the connection state and wake everybody waiting on it."""
+        self.state = state
+        waiters, self.state_waiters = self.state_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(state)
+
+    async def wait_for_state(self, *states: ConnectionState) -> ConnectionState:
+        """Wait until the connection is in one of the given states."""
+        while self.state not in states:
+            waiter = asyncio.get_running_loop().create_future()
+            self.state_waiters.append(waiter)
+            await waiter
+        return self.state
 
     async def connect(self):
+        """Connect to Seestar; the connection is re-established if it drops, until `disconnect`."""
+        try:
+            await self._open()
+        except BaseException:
+            await self._close()
+            self._set_state(ConnectionState.DISCONNECTED)
+            raise
+        self.background_task = asyncio.create_task(self._heartbeat())
+
+        logger.info("Connected to %s", self, extra={"device": self})
+
+    async def _open(self):
+        """Open the connection and resynchronize the status."""
+        self._set_state(ConnectionState.CONNECTING)
         await self.connection.open()
         self.is_connected = True
+        self.last_traffic = time.monotonic()
         self.status.reset()
+        self.cache.clear()
 
-        self.background_task = asyncio.create_task(self._heartbeat())
+        self.reader_task = asyncio.create_task(self._reader())
 
         # Upon connect, grab current status
+        device_state, view_state = await self.send_batch([GetDeviceState(), GetViewState()])
+        self.process_device_state(device_state)
+        self.process_view_state(view_state)
+        self._set_state(ConnectionState.CONNECTED)
 
-        response: CommandResponse[dict] = await self.send_and_recv(GetDeviceState())
-
-        self.process_device_state(response)
+    async def _close(self, error: Exception | None = None):
+        """Close the connection, failing outstanding commands with the given error."""
+        self.is_connected = False
+        if self.reader_task is not None and self.reader_task is not asyncio.current_task():
+            self.reader_task.cancel()
+        self.reader_task = None
+        await self.connection.close()
+        # Nobody will answer the outstanding commands now
+        for future in self.pending.values():
+            if not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+        self.pending.clear()
 
-        response = await self.send_and_recv(GetViewState())
-        print(f"Received GetViewState: {response}")
+    async def disconnect(self):
+        """Disconnect from Seestar."""
+        for task in (self.reconnect_task, self.background_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        self.reconnect_task = None
+        self.background_task = None
+        await self._close()
+        self.event_bus.close()
+        if self.journal is not None:
+            await self.journal.close()
+        self._set_state(ConnectionState.DISCONNECTED)
+        logger.info("Disconnected from %s", self, extra={"device": self})
 
-        self.process_view_state(response)
+    async def _connection_lost(self):
+        """Handle the connection dropping underneath us."""
+        logger.warning("Lost connection to %s", self, extra={"device": self})
+        await self._close(ConnectionLostError(f"Lost connection to {self}"))
+        if self.state == ConnectionState.CONNECTING:
+            # Whoever is opening the connection deals with the failure
+            return
+        if self.auto_reconnect:
+            self._set_state(ConnectionState.RECONNECTING)
+            self.reconnect_task = asyncio.create_task(self._reconnect())
+        else:
+            await self.disconnect()
 
-        if self.debug:
-            print(f"Connected to {self}")
+    async def _reconnect(self):
+        """Reconnect with jittered exponential backoff until it works."""
+        delay = self.reconnect_delay
+        while True:
+            await asyncio.sleep(random.uniform(0, delay))
+            self.metrics.reconnect_attempts += 1
+            try:
+                await self._open()
+                self.metrics.reconnects += 1
+                if self.background_task is None:
+                    self.background_task = asyncio.create_task(self._heartbeat())
+                logger.info("Reconnected to %s", self, extra={"device": self})
+                return
+            except Exception as e:
+                logger.warning("Error while reconnecting to %s: %r", self, e, extra={"device": self})
+                await self._close(ConnectionLostError(f"Lost connection to {self}"))
+                self._set_state(ConnectionState.RECONNECTING)
+                delay = min(delay * 2, self.reconnect_max_delay)
 
-    async def disconnect(self):
-        """Disconnect from Seestar."""
-        await self.connection.close()
-        self.is_connected = False
-        if self.debug:
-            print(f"Disconnected from {self}")
+    def reconnect_in_background(self):
+        """Keep trying to connect with backoff, as after a dropped link; for a Seestar that was off at first."""
+        if self.reconnect_task is not None and not self.reconnect_task.done():
+            return
+        self._set_state(ConnectionState.RECONNECTING)
+        self.reconnect_task = asyncio.create_task(self._reconnect())
 
-    async def send(self, data: str | BaseModel):
-        # todo : do connected check...
-        # todo : set "next heartbeat" time, and then in the heartbeat task, check the value
+    def _encode(self, data: str | BaseModel) -> tuple[int | None, str]:
+        """Assign an id to a command if needed and return the id with the serialized command."""
         if isinstance(data, BaseModel):
             if data.id is None:
                 data.id = self.id
                 self.id += 1
-            data = data.model_dump_json()
-        await self.connection.write(data)
+            return data.id, data.model_dump_json()
+        payload = json.loads(data)
+        if payload.get('id') is None:
+            payload['id'] = self.id
+            self.id += 1
+            data = json.dumps(payload)
+        return payload['id'], data
+
+    async def send(self, data: str | BaseModel) -> int | None:
+        """Send a command to Seestar, returning the id assigned to it."""
+        # todo : do connected check...
+        command_id, data = self._encode(data)
+        await self._write(data)
+        return command_id
+
+    async def _write(self, data: str):
+        """Write a serialized command, journaling it if enabled."""
+        if self.journal is not None:
+            self.journal.record('o', data)
+        try:
+            await self.connection.write(data)
+        except ConnectionLostError:
+            raise
+        except ConnectionError as e:
+            raise ConnectionLostError(f"Lost connection to {self}: {e}") from e
+
+    async def _write_many(self, messages: list[str]):
+        """Write serialized commands as one buffer, journaling them if enabled."""
+        if self.journal is not None:
+            for data in messages:
+                self.journal.record('o', data)
+        try:
+            await self.connection.write_many(messages)
+        except ConnectionLostError:
+            raise
+        except ConnectionError as e:
+            raise ConnectionLostError(f"Lost connection to {self}: {e}") from e
 
-    def _handle_event(self, event_str: str):
+    def set_stacking_target(self, frames: int | None = None, integration: float | None = None):
+        """Set the frame count and/or integration seconds `status.stacking.eta` counts down to."""
+        self.stacking.set_target(frames, integration)
+        self.status.stacking = self.stacking.progress()
+
+    def subscribe(self, *event_types: type[BaseEvent], maxsize: int = 100,
+                  policy: OverflowPolicy = 'drop_oldest') -> Subscription:
+        """Subscribe to events of the given types, or to every event if none are given."""
+        return self.event_bus.subscribe(*event_types, maxsize=maxsize, policy=policy)
+
+    async def _handle_event(self, event_str: bytes):
         """Parse an event."""
-        if self.debug:
-            print(f"Handling event from {self}: {event_str}")
+        if self.debug and traffic_logger.isEnabledFor(logging.DEBUG):
+            traffic_logger.debug("Event", extra={"device": self, "payload": event_str})
         try:
-            parsed = json.loads(event_str)
-            parser: ParsedEvent = ParsedEvent(event=parsed)
-            # print(f"Received event from {self}: {type(parser.event)} {parser}")
-            print(f'Received event from {self}: {parser.event.Event} {type(parser.event)}')
-            self.recent_events.append(parser.event)
-            match parser.event.Event:
+            name = event_name(event_str)
+            if name not in EVENT_MODELS:
+                raise ValueError(f"Unknown event: {name}")
+            self.cache.invalidate(name)
+            self.metrics.events[name] += 1
+            # Only the events that feed the status are validated here; the rest wait for a consumer
+            event = parse_event(event_str, name) if name in STATUS_EVENTS else LazyEvent(event_str, name)
+            match name:
                 case 'PiStatus':
-                    pi_status = parser.event
+                    pi_status = event
+                    now = time.time()
                     if pi_status.temp is not None:
                         self.status.temp = pi_status.temp
+                        self.telemetry.record('temp', pi_status.temp, now)
                     if pi_status.charger_status is not None:
                         self.status.charger_status = pi_status.charger_status
                     if pi_status.charge_online is not None:
                         self.status.charge_online = pi_status.charge_online
                     if pi_status.battery_capacity is not None:
                         self.status.battery_capacity = pi_status.battery_capacity
+                        self.telemetry.record('battery_capacity', pi_status.battery_capacity, now)
                 case 'Stack':
-                    print("Updating stacked frame and dropped frame")
+                    now = time.time()
                     if self.status.stacked_frame is not None:
-                        self.status.stacked_frame = parser.event.stacked_frame
+                        self.status.stacked_frame = event.stacked_frame
+                        self.telemetry.record('stacked_frame', event.stacked_frame, now)
                     if self.status.dropped_frame is not None:
-                        self.status.dropped_frame = parser.event.dropped_frame
+                        self.status.dropped_frame = event.dropped_frame
+                        self.telemetry.record('dropped_frame', event.dropped_frame, now)
+                    self.stacking.handle_stack(event)
+                    self.status.stacking = self.stacking.progress()
+                case 'Exposure':
+                    # Sent with every frame and only its exposure is needed, so it stays lazy
+                    if self.stacking.handle_exposure(exposure_ms(event_str)):
+                        self.status.stacking = self.stacking.progress()
+                case 'BatchStack':
+                    self.stacking.handle_batch_stack(event)
+                    self.status.stacking = self.stacking.progress()
                 case 'Annotate':
-                    self.status.annotate = AnnotateResult(**parser.event.result)
+                    self.status.annotate = event.result
+            await self.event_bus.publish(event)
         except Exception as e:
-            print(f"Error while parsing event from {self}: {event_str} {type(e)} {e}")
+            self.metrics.parse_errors['event'] += 1
+            logger.warning("Error while parsing event from %s: %r", self, e,
+                           extra={"device": self, "payload": event_str})
 
-    async def send_and_recv(self, data: str | BaseModel) -> CommandResponse[U] | None:
-        await self.send(data)
-        # below is naive...  should change it to wait for the specific command...
-        # xxx ugh!
-        while self.is_connected:
-            response = await self.recv()
-            if response is not None:
-                return response
-        return None
+    async def send_and_recv(self, data: str | BaseModel, timeout: float | None = None,
+                            deadline: float | None = None, fresh: bool = False) -> CommandResponse[U] | None:
+        """Send a command and wait for the response carrying the same id.
+
+        Waits at most `timeout` seconds (by default the command's own timeout) and never past
+        `deadline`, a `time.monotonic()` instant, raising `CommandTimeoutError` otherwise.
+        Cacheable queries are answered from the response cache unless `fresh` is set.
+        """
+        if not fresh and self.cache.cacheable(data) and data.id is None and self.is_connected:
+            # A fetch already in flight may be bounded by another caller's timeout, so bound ours too
+            limit = self._timeout(data, timeout, deadline)
+            try:
+                async with asyncio.timeout(limit):
+                    return await self.cache.get(data, lambda: self._send_and_recv(data, timeout, deadline))
+            except TimeoutError:
+                raise CommandTimeoutError(f"No response to {self._method(data)} from {self} "
+                                          f"within {limit:.1f}s") from None
+        return await self._send_and_recv(data, timeout, deadline)
 
-    async def recv(self) -> CommandResponse[U] | None:
-        """Receive data from Seestar."""
-        response = ""
+    async def _send_and_recv(self, data: str | BaseModel, timeout: float | None,
+                             deadline: float | None) -> CommandResponse[U] | None:
+        if not self._check_connected():
+            return None
+        timeout = self._timeout(data, timeout, deadline)
+        method = self._method(data)
+        command_id, data = self._encode(data)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[command_id] = future
         try:
-            while 'jsonrpc' not in response:
-                response = await self.connection.read()
-                # if self.debug:
-                #    print(f"Received data from {self}: {response}")
-                if response is None:
-                    await self.disconnect()
-                    return None
-                if 'Event' in response:
-                    # it's an event, so parse it and stash!
-                    self._handle_event(response)
-                    return None
-            return CommandResponse[U](**json.loads(response))
-        except Exception as e:
-            print(f"Error while receiving data from {self}: {response} {e}")
-            raise e
+            async with asyncio.timeout(timeout):
+                started = time.monotonic()
+                await self._write(data)
+                response = await future
+                self.metrics.observe_rtt(method, time.monotonic() - started)
+                return response
+        except TimeoutError:
+            self.metrics.command_timeouts[method] += 1
+            raise CommandTimeoutError(f"No response to command {command_id} from {self} "
+                                      f"within {timeout:.1f}s") from None
+        finally:
+            self.pending.pop(command_id, None)
+
+    @staticmethod
+    def _method(data: str | BaseModel) -> str:
+        """Method of a command, for the metrics."""
+        if isinstance(data, BaseCommand):
+            return data.method
+        return json.loads(data).get('method', 'unknown') if isinstance(data, str) else 'unknown'
+
+    def _check_connected(self) -> bool:
+        """Check if commands can be sent, raising `ConnectionLostError` while reconnecting."""
+        if not self.is_connected:
+            if self.state == ConnectionState.RECONNECTING:
+                raise ConnectionLostError(f"Reconnecting to {self}")
+            return False
+        return True
+
+    @staticmethod
+    def _timeout(data: str | BaseModel, timeout: float | None, deadline: float | None) -> float:
+        """Seconds to wait for the response to a command."""
+        if timeout is None:
+            timeout = data.timeout if isinstance(data, BaseCommand) else BaseCommand.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        return timeout
+
+    def _submit_batch(self, commands: list[str | BaseModel], timeout: float | None,
+                      deadline: float | None) -> list[Awaitable[CommandResponse[U] | None]]:
+        """Write several commands as one buffer, returning an awaitable response per command."""
+        if not self._check_connected():
+            return [asyncio.sleep(0, None) for _ in commands]
+        loop = asyncio.get_running_loop()
+        methods = [self._method(command) for command in commands]
+        encoded = [self._encode(command) for command in commands]
+        futures = []
+        for command_id, _ in encoded:
+            futures.append(loop.create_future())
+            self.pending[command_id] = futures[-1]
+        started = time.monotonic()
+        written = asyncio.ensure_future(self._write_many([data for _, data in encoded]))
+
+        async def response(command: str | BaseModel, method: str, command_id: int, future: asyncio.Future):
+            command_timeout = self._timeout(command, timeout, deadline)
+            try:
+                async with asyncio.timeout(command_timeout):
+                    # Every command of the batch waits on the same write
+                    await asyncio.shield(written)
+                    result = await future
+                    self.metrics.observe_rtt(method, time.monotonic() - started)
+                    return result
+            except TimeoutError:
+                self.metrics.command_timeouts[method] += 1
+                raise CommandTimeoutError(f"No response to command {command_id} from {self} "
+                                          f"within {command_timeout:.1f}s") from None
+            finally:
+                self.pending.pop(command_id, None)
+
+        return [response(command, method, command_id, future)
+                for command, method, (command_id, _), future in zip(commands, methods, encoded, futures)]
+
+    async def send_batch(self, commands: list[str | BaseModel], timeout: float | None = None,
+                         deadline: float | None = None,
+                         return_exceptions: bool = False) -> list[CommandResponse[U] | Exception | None]:
+        """Send several commands in a single write and gather their responses in order.
+
+        Each command is bounded by its own timeout, as with `send_and_recv`. With
+        `return_exceptions`, a failed command gets its exception instead of failing the batch.
+        """
+        return await asyncio.gather(*self._submit_batch(commands, timeout, deadline),
+                                    return_exceptions=return_exceptions)
+
+    async def send_batch_as_completed(
+            self, commands: list[str | BaseModel], timeout: float | None = None, deadline: float | None = None
+    ) -> AsyncIterator[tuple[int, CommandResponse[U] | Exception | None]]:
+        """Send several commands in a single write, yielding (index, response or exception) as they arrive."""
+        async def indexed(index: int, response: Awaitable[CommandResponse[U] | None]):
+            try:
+                return index, await response
+            except Exception as e:
+                return index, e
+
+        responses = self._submit_batch(commands, timeout, deadline)
+        for next_response in asyncio.as_completed([indexed(i, r) for i, r in enumerate(responses)]):
+            yield await next_response
+
+    def _handle_response(self, response_str: bytes):
+        """Hand a response to the caller waiting on its id."""
+        response = CommandResponse[U].model_validate_json(response_str)
+        future = self.pending.pop(response.id, None)
+        if future is None or future.done():
+            if self.debug:
+                traffic_logger.debug("Unsolicited response", extra={"device": self, "payload": response_str})
+            return
+        future.set_result(response)
+
+    async def _reader(self):
+        """Read everything Seestar sends, routing responses to their callers and events to the event handler."""
+        while self.is_connected:
+            frame = await self.connection.read()
+            if frame is None:
+                await self._connection_lost()
+                return
+            self.last_traffic = time.monotonic()
+            if self.journal is not None:
+                self.journal.record('i', frame)
+            try:
+                match frame_kind(frame):
+                    case 'response':
+                        self._handle_response(frame)
+                    case 'event':
+                        await self._handle_event(frame)
+            except Exception as e:
+                self.metrics.parse_errors['response'] += 1
+                logger.warning("Error while receiving data from %s: %r", self, e,
+                               extra={"device": self, "payload": frame})
 
     def __str__(self):
         return f"{self.host}:{self.port}"
@@ -1,5 +1,5 @@
 """Common models."""
-from typing import Generic, TypeVar
+from typing import ClassVar, Generic, TypeVar
 
 from pydantic import BaseModel
 
@@ -7,9 +7,16 @@ DataT = TypeVar("DataT")
 
 class BaseCommand(BaseModel):
     """Base command."""
+    timeout: ClassVar[float] = 10.0  # default seconds to wait for the response
     id: int | None = None
     method: str
 
+class QueryCommand(BaseCommand):
+    """Command that only reads state from the Seestar."""
+    timeout: ClassVar[float] = 5.0
+    cache_ttl: ClassVar[float | None] = None  # seconds a response may be reused, None to always ask
+    invalidated_by: ClassVar[frozenset[str]] = frozenset()  # events that make a cached response stale
+
 class CommandResponse(BaseModel, Generic[DataT]):
     """Base response."""
     id: int
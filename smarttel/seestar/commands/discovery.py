@@ -1,10 +1,14 @@
 """Seestar discovery commands."""
 import asyncio
 import json
+import logging
 import socket
 import sys
 from contextlib import suppress
+from typing import AsyncIterator, Iterable
+
 import click
+import netifaces
 from textual.app import App, ComposeResult
 from textual.containers import VerticalScroll
 from textual.widgets import Header, Footer, Static, Button, DataTable
@@ -12,6 +16,8 @@ from textual.widgets import Header, Footer, Static, Button, DataTable
 from cli.ui import CombinedSeestarUI
 from smarttel.seestar.client import SeestarClient
 
+logger = logging.getLogger(__name__)
+
 
 def get_network_info():
     """Get local IP and broadcast IP address."""
@@ -32,77 +38,124 @@ def get_network_info():
     return local_ip, broadcast_ip
 
 
-async def discover_seestars(timeout=10):
-    """Discover Seestars using asyncio for asynchronous UDP broadcasting."""
-    # Broadcast message to send to Seestar
+def broadcast_addresses() -> list[tuple[str, str]]:
+    """Local IP and broadcast address of every IPv4 interface that can broadcast."""
+    addresses = []
+    for interface in netifaces.interfaces():
+        for address in netifaces.ifaddresses(interface).get(netifaces.AF_INET, []):
+            if address.get('broadcast') and address.get('addr'):
+                addresses.append((address['addr'], address['broadcast']))
+    return addresses or [get_network_info()]
+
+
+def device_serial_number(device: dict) -> str | None:
+    """Serial number a Seestar gave in its discovery reply."""
+    result = device.get('data', {}).get('result')
+    return result.get('sn') if isinstance(result, dict) else None
+
 
-    local_ip, broadcast_ip = get_network_info()
-    broadcast_message = json.dumps({"id": 201, "method": "scan_iscope", "name": "iphone", "ip": local_ip}) + "\r\n"
-    discovered_devices = []
+async def discover(timeout: float = 3.0, limit: int | None = None, serial_number: str | None = None,
+                   addresses: Iterable[str] = (), port: int = 4720) -> AsyncIterator[dict]:
+    """Discover Seestars, yielding each one as soon as it answers.
 
-    # Convert the message to JSON string and then to bytes
-    message = broadcast_message.encode('utf-8')
+    `scan_iscope` is broadcast on every interface, and sent directly to any extra `addresses`.
+    Devices are yielded once per address as `{'address': ..., 'data': <reply>}`. Discovery ends
+    after `timeout` seconds or after `limit` devices. With a serial number, only that Seestar is
+    yielded and discovery ends as soon as it answers.
+    """
+    loop = asyncio.get_running_loop()
+    replies: asyncio.Queue[tuple[str, bytes]] = asyncio.Queue()
 
-    # Create a UDP socket for broadcasting
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    class DiscoveryProtocol(asyncio.DatagramProtocol):
+        def datagram_received(self, data, addr):
+            replies.put_nowait((addr[0], data))
 
+    transport, _ = await loop.create_datagram_endpoint(DiscoveryProtocol, local_addr=('0.0.0.0', 0),
+                                                       allow_broadcast=True)
     try:
-        # Bind to a local address to receive responses
-        sock.bind(('0.0.0.0', 0))
-
-        # Create a transport for the socket
-        loop = asyncio.get_event_loop()
-
-        # Protocol to handle responses
-        class DiscoveryProtocol(asyncio.DatagramProtocol):
-            def connection_made(self, transport):
-                self.transport = transport
-
-            def datagram_received(self, data, addr):
-                print(f"Received response from {addr}")
-                try:
-                    response = json.loads(data.decode('utf-8'))
-                    discovered_devices.append({
-                        'address': addr[0],
-                        'data': response
-                    })
-                except json.JSONDecodeError:
-                    print(f"Received non-JSON response from {addr}: {data}")
-
-        # Create the protocol and get the transport
-        transport, protocol = await loop.create_datagram_endpoint(
-            DiscoveryProtocol,
-            sock=sock
-        )
-
-        port = 4720
-        transport.sendto(message, (broadcast_ip, port))
-        print(f"Sent discovery message to broadcast:{port}")
-
-        # Wait for responses
-        await asyncio.sleep(timeout)  # Listen for specified seconds
-
-        # Close the transport
+        targets = broadcast_addresses()
+        targets += [(targets[0][0], address) for address in addresses]
+        for local_ip, target in targets:
+            message = json.dumps({"id": 201, "method": "scan_iscope", "name": "iphone", "ip": local_ip}) + "\r\n"
+            try:
+                transport.sendto(message.encode('utf-8'), (target, port))
+            except OSError as e:
+                logger.warning("Error sending discovery message to %s:%d: %s", target, port, e)
+
+        seen = set()
+        found = 0
+        deadline = loop.time() + timeout
+        while found != limit:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    address, data = await replies.get()
+            except TimeoutError:
+                return
+            if address in seen:
+                continue
+            try:
+                device = {'address': address, 'data': json.loads(data.decode('utf-8'))}
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                logger.warning("Received non-JSON response from %s", address, extra={"payload": data})
+                continue
+            seen.add(address)
+            if serial_number is not None and device_serial_number(device) != serial_number:
+                continue
+            found += 1
+            logger.debug("Discovered Seestar at %s", address, extra={"payload": data})
+            yield device
+            if serial_number is not None:
+                return
+    finally:
         transport.close()
 
-    except Exception as e:
-        print(f"Error during discovery: {e}")
-        sock.close()
 
-    print(f"Discovery complete. Found {len(discovered_devices)} devices.")
+async def discover_seestars(timeout=10):
+    """Discover Seestars, returning every device that answered within the timeout."""
+    discovered_devices = [device async for device in discover(timeout)]
+    logger.info("Discovery complete. Found %d devices.", len(discovered_devices))
     return discovered_devices
 
 
-async def select_device_and_connect(host=None, port=None):
-    """Discover devices and either connect directly or show a picker UI."""
+async def select_device_and_connect(host=None, port=None, serial_number=None, registry=None):
+    """Discover devices and either connect directly or show a picker UI.
+
+    With a serial number, connect to that Seestar as soon as it answers discovery. With a
+    `DeviceRegistry`, the known Seestars that answer a quick probe are offered right away, fastest
+    first, while discovery keeps the registry up to date in the background and adds the Seestars
+    only it found, such as new ones, to the picker.
+    """
+    refresh = None
+    reachable = []
+    if not host and registry is not None:
+        refresh = asyncio.create_task(registry.refresh(timeout=3))
+        reachable = await registry.probe()
+        if serial_number:
+            reachable = [device for device in reachable if device.key == serial_number]
+
+    if not host and serial_number:
+        if reachable:
+            host = reachable[0].address
+        else:
+            print(f"Discovering Seestar {serial_number}...")
+            async for device in discover(timeout=3, serial_number=serial_number):
+                host = device['address']
+        if not host:
+            print(f"Seestar {serial_number} not found. Exiting.")
+            return
+
     app = CombinedSeestarUI(host, port)
     
     if not host or not port:
-        # Discover devices
-        print("Discovering Seestar devices...")
-        devices = await discover_seestars(timeout=3)
+        if reachable:
+            devices = [device.as_discovered() for device in reachable]
+        elif refresh is not None:
+            print("Discovering Seestar devices...")
+            devices = [device.as_discovered() for device in await refresh]
+        else:
+            # Discover devices
+            print("Discovering Seestar devices...")
+            devices = await discover_seestars(timeout=3)
         
         if not devices:
             print("No Seestar devices found. Exiting.")
@@ -110,17 +163,29 @@ async def select_device_and_connect(host=None, port=None):
         
         # Set up the device picker in the app
         app.set_device_picker(devices)
+        if reachable and refresh is not None:
+            asyncio.create_task(_add_discovered(app, refresh, {device.key for device in reachable}))
 
     # Run the combined app - it will handle both device picking and connection
     await app.run_async()
+    if refresh is not None:
+        await refresh
+
+
+async def _add_discovered(app, refresh: asyncio.Task, shown: set[str]):
+    """Add the devices background discovery found to the picker, after those already in it."""
+    devices = [device.as_discovered() for device in await refresh if device.key not in shown]
+    if devices:
+        app.add_picker_devices(devices)
 
 
 @click.command()
 @click.option("--host", help="Seestar host address")
 @click.option("--port", type=int, default=4700, help="Seestar port (default: 4700)")
-def main(host, port):
+@click.option("--serial", help="Serial number of the Seestar to discover and connect to")
+def main(host, port, serial):
     """Connect to a Seestar device, with optional device discovery."""
-    asyncio.run(select_device_and_connect(host, port))
+    asyncio.run(select_device_and_connect(host, port, serial))
 
 
 if __name__ == "__main__":
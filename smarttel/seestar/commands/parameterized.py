@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Literal, Any
+from typing import ClassVar, Literal, Any
 
 from smarttel.seestar.commands.common import BaseCommand
 
@@ -7,14 +7,20 @@ from smarttel.seestar.commands.common import BaseCommand
 class StopStage(str, Enum):
     """Stop stage."""
     DARK_LIBRARY = "DarkLibrary"
-    STACK = "AutoGoto"
+    STACK = "Stack"
     AUTO_GOTO = "AutoGoto"
 
 class IscopeStartStack(BaseCommand):
     """Start the stack from the Seestar."""
+    timeout: ClassVar[float] = 60.0
     method: Literal["iscope_start_stack"] = "iscope_start_stack"
     params: dict[str, Any] | None = None # restart boolean
 
+class IscopeStartView(BaseCommand):
+    """Start the view from the Seestar, going to a target first if one is given."""
+    method: Literal["iscope_start_view"] = "iscope_start_view"
+    params: dict[str, Any] | None = None # mode, target_ra_dec, target_name, lp_filter
+
 class IscopeStopView(BaseCommand):
     """Stop the view from the Seestar."""
     method: Literal["iscope_stop_view"] = "iscope_stop_view"
@@ -1,86 +1,95 @@
 """Simple commands without parameters."""
-from typing import Literal, NamedTuple
+from typing import ClassVar, Literal, NamedTuple
 
 from pydantic import BaseModel
 
-from smarttel.seestar.commands.common import BaseCommand
+from smarttel.seestar.commands.common import BaseCommand, QueryCommand
 
-class GetAnnotatedResult(BaseCommand): # xxx is there an issue?
+class GetAnnotatedResult(QueryCommand): # xxx is there an issue?
     """Get the annotated result from the Seestar."""
     method: Literal["get_annotated_result"] = "get_annotated_result"
 
-class GetCameraInfo(BaseCommand):
+class GetCameraInfo(QueryCommand):
     """Get the camera info from the Seestar."""
     method: Literal["get_camera_info"] = "get_camera_info"
+    cache_ttl: ClassVar[float | None] = float("inf")  # doesn't change while connected
 
 
-class GetCameraState(BaseCommand):
+class GetCameraState(QueryCommand):
     """Get the camera state from the Seestar."""
     method: Literal["get_camera_state"] = "get_camera_state"
 
-class GetDeviceState(BaseCommand):
+class GetDeviceState(QueryCommand):
     """Get the device state from the Seestar."""
     method: Literal["get_device_state"] = "get_device_state"
+    cache_ttl: ClassVar[float | None] = 5.0
+    invalidated_by: ClassVar[frozenset[str]] = frozenset({"Setting"})
 
 
-class GetDiskVolume(BaseCommand):
+class GetDiskVolume(QueryCommand):
     """Get the disk volume from the Seestar."""
     method: Literal["get_disk_volume"] = "get_disk_volume"
+    cache_ttl: ClassVar[float | None] = 60.0
+    invalidated_by: ClassVar[frozenset[str]] = frozenset({"DiskSpace"})
 
-class GetFocuserPosition(BaseCommand):
+class GetFocuserPosition(QueryCommand):
     """Get the focuser position from the Seestar."""
     method: Literal["get_focuser_position"] = "get_focuser_position"
 
-class GetLastSolveResult(BaseCommand):
+class GetLastSolveResult(QueryCommand):
     """Get the last solve result from the Seestar."""
     method: Literal["get_last_solve_result"] = "get_last_solve_result"
 
-class GetSetting(BaseCommand):
+class GetSetting(QueryCommand):
     """Get the settings from the Seestar."""
     method: Literal["get_setting"] = "get_setting"
+    cache_ttl: ClassVar[float | None] = 30.0
+    invalidated_by: ClassVar[frozenset[str]] = frozenset({"Setting"})
 
-class GetSolveResult(BaseCommand):
+class GetSolveResult(QueryCommand):
     """Get the solve result from the Seestar."""
     method: Literal["get_solve_result"] = "get_solve_result"
 
-class GetStackSetting(BaseCommand):
+class GetStackSetting(QueryCommand):
     """Get the stack setting from the Seestar."""
     method: Literal["get_stack_setting"] = "get_stack_setting"
 
-class GetStackInfo(BaseCommand):
+class GetStackInfo(QueryCommand):
     """Get the stack info from the Seestar."""
     method: Literal["get_stack_info"] = "get_stack_info"
 
 
-class GetTime(BaseCommand):
+class GetTime(QueryCommand):
     """Get the current time from the Seestar."""
     method: Literal["pi_get_time"] = "pi_get_time"
 
-class GetUserLocation(BaseCommand):
+class GetUserLocation(QueryCommand):
     """Get the user location from the Seestar."""
     method: Literal["get_user_location"] = "get_user_location"
 
-class GetViewState(BaseCommand):
+class GetViewState(QueryCommand):
     """Get the view state from the Seestar."""
     method: Literal["get_view_state"] = "get_view_state"
+    cache_ttl: ClassVar[float | None] = 2.0
+    invalidated_by: ClassVar[frozenset[str]] = frozenset({"View", "AutoGoto"})
 
-class GetWheelPosition(BaseCommand):
+class GetWheelPosition(QueryCommand):
     """Get the wheel position from the Seestar."""
     method: Literal["get_wheel_position"] = "get_wheel_position"
 
-class GetWheelSetting(BaseCommand):
+class GetWheelSetting(QueryCommand):
     """Get the wheel setting from the Seestar."""
     method: Literal["get_wheel_setting"] = "get_wheel_setting"
 
-class GetWheelState(BaseCommand):
+class GetWheelState(QueryCommand):
     """Get the wheel state from the Seestar."""
     method: Literal["get_wheel_state"] = "get_wheel_state"
 
-class ScopeGetEquCoord(BaseCommand):
+class ScopeGetEquCoord(QueryCommand):
     """Get the equatorial coordinates from the Seestar."""
     method: Literal["scope_get_equ_coord"] = "scope_get_equ_coord"
 
-class ScopeGetRaDecCoord(BaseCommand):
+class ScopeGetRaDecCoord(QueryCommand):
     """Get the right ascension and declination from the Seestar."""
     method: Literal["scope_get_ra_dec"] = "scope_get_ra_dec"
 
@@ -90,6 +99,7 @@ class ScopePark(BaseCommand):
 
 class StartAutoFocus(BaseCommand):
     """Start the auto focus from the Seestar."""
+    timeout: ClassVar[float] = 60.0
     method: Literal["start_auto_focuse"] = "start_auto_focuse"
 
 class StopAutoFocus(BaseCommand):
@@ -1,7 +1,27 @@
 """Establish connection with Seestar."""
 import asyncio
-from asyncio import StreamReader, StreamWriter, IncompleteReadError
-from pydantic import BaseModel
+import logging
+from asyncio import StreamReader, StreamWriter, IncompleteReadError, LimitOverrunError
+from contextlib import suppress
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.metrics import TrafficCounters
+
+logger = logging.getLogger(__name__)
+
+FrameKind = Literal['response', 'event']
+
+
+def frame_kind(frame: bytes) -> FrameKind | None:
+    """Classify a raw frame as a command response or an event without decoding it."""
+    if b'"jsonrpc"' in frame:
+        return 'response'
+    if b'"Event"' in frame:
+        return 'event'
+    return None
+
 
 class SeestarConnection(BaseModel, arbitrary_types_allowed=True):
     """Connection with Seestar."""
@@ -9,33 +29,100 @@ class SeestarConnection(BaseModel, arbitrary_types_allowed=True):
     writer: StreamWriter | None = None
     host: str
     port: int
-    written_messages: int = 0
-    read_messages: int = 0
-
+    max_frame_size: int = 1024 * 1024  # large enough for Annotate events
+    traffic: TrafficCounters = Field(default_factory=TrafficCounters)
+    dropped_frames: int = 0
+    outgoing: list[bytes] = []  # messages waiting for the end of the loop tick
+    flushed: asyncio.Future | None = None
 
     async def open(self):
         """Open connection with Seestar."""
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
-        self.written_messages = 0
-        self.read_messages = 0
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=self.max_frame_size)
+        self.traffic = TrafficCounters()
+        self.dropped_frames = 0
 
 
     async def close(self):
         """Close connection with Seestar."""
-        self.writer.close()
-        await self.writer.wait_closed()
+        if self.writer is None:
+            return
+        writer, self.writer, self.reader = self.writer, None, None
+        writer.close()
+        with suppress(ConnectionError):
+            await writer.wait_closed()
 
     async def write(self, data: str):
-        """Write data to Seestar."""
-        data += "\n"
-        self.writer.write(data.encode())
-        await self.writer.drain()
+        """Write data to Seestar.
+
+        Writes issued in the same event loop tick are coalesced into a single socket write.
+        """
+        await self.write_many([data])
+
+    async def write_many(self, messages: list[str]):
+        """Write several messages to Seestar as one buffer."""
+        loop = asyncio.get_running_loop()
+        self.outgoing.extend(message.encode() + b"\n" for message in messages)
+        self.traffic.messages_out += len(messages)
+        if self.flushed is None:
+            self.flushed = loop.create_future()
+            loop.call_soon(self._flush)
+        # Shared by every writer of this tick, so one of them giving up must not cancel it for the rest
+        writer = await asyncio.shield(self.flushed)
+        if not writer.is_closing():
+            await writer.drain()
+
+    def _flush(self):
+        """Write what was queued this tick, resolving the shared future with the writer used."""
+        data, self.outgoing = b"".join(self.outgoing), []
+        flushed, self.flushed = self.flushed, None
+        writer = self.writer
+        if writer is None:
+            if not flushed.done():
+                flushed.set_exception(ConnectionError(f"Not connected to {self}"))
+                # Don't complain if every writer has given up by now
+                flushed.exception()
+            return
+        writer.write(data)
+        self.traffic.bytes_out += len(data)
+        if not flushed.done():
+            flushed.set_result(writer)
 
-    async def read(self) -> str | None:
-        """Read data from Seestar."""
+    async def read(self) -> bytes | None:
+        """Read one raw frame from Seestar, skipping frames larger than `max_frame_size`."""
+        oversized = False
         try:
-            data = await self.reader.readuntil()
-            return data.decode().strip()
-        except IncompleteReadError as e:
-            print(f"Error while reading from {self}: {e}")
-            await self.close()
\ No newline at end of file
+            while True:
+                try:
+                    frame = await self.reader.readuntil(b'\n')
+                except LimitOverrunError as e:
+                    # Throw away what is buffered and keep going until the end of the frame
+                    await self.reader.readexactly(e.consumed)
+                    self.traffic.bytes_in += e.consumed
+                    oversized = True
+                    continue
+                if oversized:
+                    oversized = False
+                    self.dropped_frames += 1
+                    logger.warning("Dropped frame from %s larger than %d bytes", self, self.max_frame_size,
+                                   extra={"device": self})
+                    continue
+                traffic = self.traffic
+                traffic.messages_in += 1
+                traffic.bytes_in += len(frame)
+                return frame
+        except (IncompleteReadError, ConnectionError) as e:
+            logger.info("Error while reading from %s: %s", self, e, extra={"device": self})
+            await self.close()
+
+    @property
+    def written_messages(self) -> int:
+        """Messages written since the connection was opened."""
+        return self.traffic.messages_out
+
+    @property
+    def read_messages(self) -> int:
+        """Frames read since the connection was opened."""
+        return self.traffic.messages_in
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
@@ -1,4 +1,5 @@
-from typing import Literal, Annotated, Any
+import re
+from typing import Literal, Annotated, Any, get_args
 
 from pydantic import BaseModel, Field
 
@@ -348,3 +349,57 @@ EventTypes = Annotated[AlertEvent
                        | ViewPlanEvent
                        | WheelMoveEvent,
 Field(discriminator="Event")]
+
+
+EVENT_MODELS: dict[str, type[BaseEvent]] = {
+    model.model_fields['Event'].default: model for model in get_args(get_args(EventTypes)[0])
+}
+"""Event model for each `Event` name, built once so parsing skips the union lookup."""
+
+_EVENT_NAME_RE = re.compile(r'"Event"\s*:\s*"([^"]*)"')
+_EVENT_NAME_BYTES_RE = re.compile(rb'"Event"\s*:\s*"([^"]*)"')
+
+
+def event_name(raw: str | bytes) -> str | None:
+    """Get the `Event` name of a raw event without parsing the whole message."""
+    if isinstance(raw, str):
+        match = _EVENT_NAME_RE.search(raw)
+        return match.group(1) if match else None
+    match = _EVENT_NAME_BYTES_RE.search(raw)
+    return match.group(1).decode() if match else None
+
+
+def parse_event(raw: str | bytes, name: str | None = None) -> BaseEvent:
+    """Parse a raw event straight into its model."""
+    if name is None:
+        name = event_name(raw)
+    model = EVENT_MODELS.get(name)
+    if model is None:
+        raise ValueError(f"Unknown event: {name}")
+    return model.model_validate_json(raw)
+
+
+class LazyEvent:
+    """Raw event that is only validated when one of its typed fields is read."""
+    __slots__ = ('Event', 'raw', '_parsed')
+
+    def __init__(self, raw: str | bytes, name: str | None = None):
+        self.raw = raw
+        self.Event = name if name is not None else event_name(raw)
+        self._parsed = None
+
+    @property
+    def event(self) -> BaseEvent:
+        """The validated event model."""
+        if self._parsed is None:
+            self._parsed = parse_event(self.raw, self.Event)
+        return self._parsed
+
+    def __getattr__(self, item):
+        return getattr(self.event, item)
+
+    def __str__(self):
+        return str(self.event)
+
+    def __repr__(self):
+        return repr(self.event)
@@ -0,0 +1,126 @@
+"""Publish/subscribe bus for Seestar events."""
+import asyncio
+import collections
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.events import BaseEvent, LazyEvent
+
+OverflowPolicy = Literal['block', 'drop_oldest', 'conflate']
+"""What a subscription does when its queue is full.
+
+- block: the publisher waits for the subscriber, pushing back on the connection.
+- drop_oldest: the oldest queued event is discarded.
+- conflate: only the latest event of each type is kept.
+"""
+
+
+class Subscription(BaseModel, arbitrary_types_allowed=True):
+    """Subscription to events on an `EventBus`, consumed as an async iterator."""
+    bus: 'EventBus'
+    event_names: frozenset[str] | None = None  # None means every event
+    maxsize: int = 100
+    policy: OverflowPolicy = 'drop_oldest'
+    dropped: int = 0
+    closed: bool = False
+    items: collections.deque = Field(default_factory=collections.deque)
+    latest: dict[str, BaseEvent] = Field(default_factory=dict)
+    ready: asyncio.Event = Field(default_factory=asyncio.Event)
+    space: asyncio.Event = Field(default_factory=asyncio.Event)
+
+    def wants(self, name: str) -> bool:
+        """Check if this subscription is interested in the named event."""
+        return self.event_names is None or name in self.event_names
+
+    def qsize(self) -> int:
+        """Number of events waiting to be consumed."""
+        return len(self.latest) if self.policy == 'conflate' else len(self.items)
+
+    def offer(self, event: BaseEvent) -> bool:
+        """Queue an event without waiting; False if a blocking subscription is full."""
+        if self.closed:
+            return True
+        if self.policy == 'conflate':
+            self.latest[event.Event] = event
+        elif len(self.items) >= self.maxsize:
+            if self.policy == 'block':
+                return False
+            self.items.popleft()
+            self.dropped += 1
+            self.items.append(event)
+        else:
+            self.items.append(event)
+        self.ready.set()
+        return True
+
+    async def put(self, event: BaseEvent):
+        """Queue an event, waiting for room if the subscription blocks."""
+        while not self.offer(event):
+            self.space.clear()
+            await self.space.wait()
+
+    def close(self):
+        """Stop the subscription; iteration ends once the queued events are consumed."""
+        self.closed = True
+        self.bus.unsubscribe(self)
+        self.ready.set()
+        self.space.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> BaseEvent:
+        while not (self.items or self.latest):
+            if self.closed:
+                raise StopAsyncIteration
+            self.ready.clear()
+            await self.ready.wait()
+        if self.latest:
+            return self.latest.pop(next(iter(self.latest)))
+        event = self.items.popleft()
+        self.space.set()
+        return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class EventBus(BaseModel, arbitrary_types_allowed=True):
+    """Fan events out to subscribers, each with its own queue and overflow policy."""
+    subscriptions: list[Subscription] = []
+
+    def subscribe(self, *event_types: type[BaseEvent], maxsize: int = 100,
+                  policy: OverflowPolicy = 'drop_oldest') -> Subscription:
+        """Subscribe to the given event types, or to every event if none are given."""
+        event_names = frozenset(t.model_fields['Event'].default for t in event_types) if event_types else None
+        subscription = Subscription(bus=self, event_names=event_names, maxsize=maxsize, policy=policy)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription from the bus."""
+        self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+
+    async def publish(self, event: BaseEvent | LazyEvent):
+        """Deliver an event to every interested subscriber."""
+        typed = None
+        for subscription in tuple(self.subscriptions):
+            if not subscription.wants(event.Event):
+                continue
+            if typed is None:
+                # Lazy events are only validated once somebody actually wants them
+                typed = event.event if isinstance(event, LazyEvent) else event
+            if not subscription.offer(typed):
+                await subscription.put(typed)
+
+    def close(self):
+        """Close every subscription."""
+        for subscription in tuple(self.subscriptions):
+            subscription.close()
+
+
+Subscription.model_rebuild()
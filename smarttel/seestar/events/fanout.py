@@ -0,0 +1,78 @@
+"""Fan the events of one Seestar out to many viewers, encoding each event only once."""
+import asyncio
+from typing import NamedTuple
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.events import EVENT_MODELS
+from smarttel.seestar.events.bus import EventBus, OverflowPolicy, Subscription
+
+
+class EncodedEvent(NamedTuple):
+    """Event already encoded as JSON, shared by every viewer it goes to."""
+    Event: str
+    json: str
+
+
+class EventFanout(BaseModel, arbitrary_types_allowed=True):
+    """Single upstream subscription to a Seestar's event bus, republished encoded to viewers.
+
+    The upstream subscription only asks for the event types some viewer wants, so events nobody
+    watches are never validated or encoded. Viewers are subscriptions on a bus of their own that
+    never blocks: a viewer that falls behind loses its oldest events or has them conflated, and
+    never holds up the others.
+    """
+    upstream: EventBus
+    maxsize: int = 1000
+    viewers: EventBus = Field(default_factory=EventBus)
+    subscription: Subscription | None = None
+    pump: asyncio.Task | None = None
+    encoded: int = 0
+
+    def subscribe(self, event_names: set[str] | None = None, maxsize: int = 100,
+                  policy: OverflowPolicy = 'conflate') -> Subscription:
+        """Add a viewer of the named events, or of every event; it yields `EncodedEvent`s."""
+        if policy == 'block':
+            raise ValueError("Viewers can't block the fan-out")
+        unknown = set(event_names or ()) - EVENT_MODELS.keys()
+        if unknown:
+            raise ValueError(f"Unknown events: {', '.join(sorted(unknown))}")
+        event_types = [EVENT_MODELS[name] for name in sorted(event_names or ())]
+        viewer = self.viewers.subscribe(*event_types, maxsize=maxsize, policy=policy)
+        if self.pump is None or self.pump.done():
+            self.subscription = self.upstream.subscribe(maxsize=self.maxsize)
+            self.pump = asyncio.create_task(self._pump())
+        self._update_interest()
+        return viewer
+
+    def unsubscribe(self, viewer: Subscription):
+        """Remove a viewer."""
+        viewer.close()
+        self._update_interest()
+
+    def _update_interest(self):
+        if self.subscription is None:
+            return
+        viewers = self.viewers.subscriptions
+        if any(viewer.event_names is None for viewer in viewers):
+            self.subscription.event_names = None
+        else:
+            self.subscription.event_names = frozenset().union(*(viewer.event_names for viewer in viewers))
+
+    async def _pump(self):
+        async for event in self.subscription:
+            if not any(viewer.wants(event.Event) for viewer in self.viewers.subscriptions):
+                continue
+            self.encoded += 1
+            await self.viewers.publish(EncodedEvent(event.Event, event.model_dump_json()))
+        # The Seestar went away, and its viewers with it
+        self.viewers.close()
+
+    async def close(self):
+        """Stop the fan-out and every viewer."""
+        if self.subscription is not None:
+            self.subscription.close()
+        if self.pump is not None:
+            self.pump.cancel()
+            self.pump = None
+        self.viewers.close()
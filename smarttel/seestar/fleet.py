@@ -0,0 +1,145 @@
+"""Drive several Seestars from one event loop."""
+import asyncio
+from typing import Iterable
+
+from pydantic import BaseModel
+
+from smarttel.seestar.client import ConnectionState, SeestarClient
+from smarttel.seestar.commands.common import BaseCommand, CommandResponse
+from smarttel.seestar.metrics import histogram_lines, metric_lines
+
+
+class SeestarFleet(BaseModel, arbitrary_types_allowed=True):
+    """Fleet of Seestar clients, keyed by device name."""
+    clients: dict[str, SeestarClient] = {}
+    connect_timeout: float = 10.0
+    command_timeout: float = 10.0
+
+    def add(self, name: str, host: str, port: int = 4700, debug: bool = False) -> SeestarClient:
+        """Add a Seestar to the fleet."""
+        if name in self.clients:
+            raise ValueError(f"Duplicate Seestar name: {name}")
+        client = SeestarClient(host, port, debug=debug)
+        self.clients[name] = client
+        return client
+
+    def select(self, names: Iterable[str] | None = None) -> dict[str, SeestarClient]:
+        """Get the named clients, or all of them."""
+        if names is None:
+            return dict(self.clients)
+        return {name: self.clients[name] for name in names}
+
+    async def _gather(self, clients: dict[str, SeestarClient], operation, timeout: float | None) -> dict:
+        """Run an operation on each client concurrently, bounding each by its own timeout."""
+        results = await asyncio.gather(
+            *(asyncio.wait_for(operation(client), timeout) for client in clients.values()),
+            return_exceptions=True)
+        return dict(zip(clients, results))
+
+    async def connect(self, names: Iterable[str] | None = None) -> dict[str, Exception | None]:
+        """Connect to Seestars concurrently, returning the error (if any) per device.
+
+        Devices that fail keep being retried in the background, like a dropped link, unless
+        their client has `auto_reconnect` off.
+        """
+        async def connect(client: SeestarClient):
+            try:
+                await client.connect()
+            except BaseException:
+                # Don't leave a half-bootstrapped client looking connected
+                if client.is_connected:
+                    await client.disconnect()
+                if client.auto_reconnect:
+                    client.reconnect_in_background()
+                raise
+
+        return await self._gather(self.select(names), connect, self.connect_timeout)
+
+    async def disconnect(self, names: Iterable[str] | None = None):
+        """Disconnect from Seestars concurrently."""
+        async def disconnect(client: SeestarClient):
+            if client.state != ConnectionState.DISCONNECTED:
+                await client.disconnect()
+
+        await self._gather(self.select(names), disconnect, self.connect_timeout)
+
+    async def send_and_recv(self, command: BaseCommand, names: Iterable[str] | None = None,
+                            timeout: float | None = None) -> dict[str, CommandResponse | Exception | None]:
+        """Send a command to several Seestars at once and gather the responses.
+
+        A device that fails or does not answer within the timeout gets its exception instead of a response.
+        """
+        timeout = timeout if timeout is not None else min(command.timeout, self.command_timeout)
+
+        async def send_and_recv(client: SeestarClient):
+            if not client.is_connected:
+                raise ConnectionError(f"Not connected to {client}")
+            # Each device assigns its own id
+            return await client.send_and_recv(command.model_copy(update={'id': None}), timeout=timeout)
+
+        return await self._gather(self.select(names), send_and_recv, None)
+
+    def status(self) -> dict[str, dict]:
+        """Status of every Seestar in the fleet."""
+        return {
+            name: {
+                "host": client.host,
+                "port": client.port,
+                "connected": client.is_connected,
+                "state": client.state.value,
+                "heartbeat": client.heartbeat.summary(),
+                "status": client.status.model_dump(),
+            }
+            for name, client in self.clients.items()
+        }
+
+    def metrics(self) -> list[str]:
+        """Prometheus exposition lines for every Seestar in the fleet."""
+        clients = [({"device": name}, client) for name, client in self.clients.items()]
+
+        def per_client(name: str, kind: str, description: str, value) -> list[str]:
+            return metric_lines(name, kind, description, ((labels, value(client)) for labels, client in clients))
+
+        def per_key(name: str, kind: str, description: str, label: str, counts) -> list[str]:
+            return metric_lines(name, kind, description, (
+                ({**labels, label: key}, count) for labels, client in clients for key, count in counts(client).items()))
+
+        return [
+            *per_client("seestar_connected", "gauge", "Whether the Seestar is connected.",
+                        lambda c: int(c.is_connected)),
+            *per_client("seestar_messages_received_total", "counter", "Frames read from the Seestar.",
+                        lambda c: c.connection.traffic.messages_in),
+            *per_client("seestar_messages_sent_total", "counter", "Commands written to the Seestar.",
+                        lambda c: c.connection.traffic.messages_out),
+            *per_client("seestar_received_bytes_total", "counter", "Bytes read from the Seestar.",
+                        lambda c: c.connection.traffic.bytes_in),
+            *per_client("seestar_sent_bytes_total", "counter", "Bytes written to the Seestar.",
+                        lambda c: c.connection.traffic.bytes_out),
+            *per_client("seestar_dropped_frames_total", "counter", "Oversized frames skipped.",
+                        lambda c: c.connection.dropped_frames),
+            *histogram_lines("seestar_command_rtt_seconds", "Round trip time of commands by method.", (
+                ({**labels, "method": method}, histogram)
+                for labels, client in clients for method, histogram in client.metrics.rtt.items())),
+            *per_key("seestar_command_timeouts_total", "counter", "Commands that timed out by method.",
+                     "method", lambda c: c.metrics.command_timeouts),
+            *per_key("seestar_events_total", "counter", "Events received by type.",
+                     "type", lambda c: c.metrics.events),
+            *per_key("seestar_parse_errors_total", "counter", "Frames that could not be handled by kind.",
+                     "kind", lambda c: c.metrics.parse_errors),
+            *per_client("seestar_reconnect_attempts_total", "counter", "Attempts to reconnect.",
+                        lambda c: c.metrics.reconnect_attempts),
+            *per_client("seestar_reconnects_total", "counter", "Successful reconnects.",
+                        lambda c: c.metrics.reconnects),
+            *per_client("seestar_heartbeats_missed_total", "counter", "Heartbeats that got no answer in time.",
+                        lambda c: c.heartbeat.total_missed),
+            *per_client("seestar_pending_commands", "gauge", "Commands waiting for a response.",
+                        lambda c: len(c.pending)),
+            *per_client("seestar_event_queue_depth", "gauge", "Events queued for subscribers.",
+                        lambda c: sum(s.qsize() for s in c.event_bus.subscriptions)),
+            *per_client("seestar_event_queue_dropped", "gauge", "Events dropped by current subscribers.",
+                        lambda c: sum(s.dropped for s in c.event_bus.subscriptions)),
+            *per_client("seestar_cache_hits_total", "counter", "Queries answered from the response cache.",
+                        lambda c: c.cache.hits + c.cache.coalesced),
+            *per_client("seestar_cache_misses_total", "counter", "Queries sent to the Seestar by the response cache.",
+                        lambda c: c.cache.misses),
+        ]
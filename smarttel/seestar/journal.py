@@ -0,0 +1,221 @@
+"""Append-only journal of the raw traffic with a Seestar.
+
+A journal is a directory of segments. Each segment is a text file of records, one per line:
+
+    <monotonic>\\t<wall clock>\\t<direction>\\t<raw JSON line>
+
+where direction is `i` for traffic from the Seestar and `o` for traffic to it. Next to every
+segment is a JSON index giving its time span, a sparse time index of byte offsets and the byte
+offsets of every event by `Event` name, so time ranges and event types can be pulled out of a
+long session without scanning it all. Indexes of segments that were not closed cleanly are
+rebuilt on read.
+"""
+import asyncio
+import bisect
+import time
+from pathlib import Path
+from typing import Iterator, Literal, NamedTuple
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.events import event_name
+
+Direction = Literal['i', 'o']
+
+
+class JournalRecord(NamedTuple):
+    """Raw line recorded in the journal."""
+    monotonic: float
+    wall: float
+    direction: Direction
+    raw: bytes
+
+
+class SegmentIndex(BaseModel):
+    """Sidecar index of a journal segment."""
+    records: int = 0
+    start_wall: float | None = None
+    end_wall: float | None = None
+    start_monotonic: float | None = None
+    end_monotonic: float | None = None
+    time: list[tuple[float, int]] = []  # (wall clock, byte offset) every `time_index_interval` records
+    events: dict[str, list[int]] = {}  # Event name -> byte offsets
+
+    def add(self, record: JournalRecord, offset: int, interval: int):
+        """Index a record written at the given byte offset."""
+        if self.start_wall is None:
+            self.start_wall = record.wall
+            self.start_monotonic = record.monotonic
+        self.end_wall = record.wall
+        self.end_monotonic = record.monotonic
+        if self.records % interval == 0:
+            self.time.append((record.wall, offset))
+        self.records += 1
+        if record.direction == 'i':
+            name = event_name(record.raw)
+            if name is not None:
+                self.events.setdefault(name, []).append(offset)
+
+
+def _format(record: JournalRecord) -> bytes:
+    return b"%.6f\t%.6f\t%s\t%s\n" % (record.monotonic, record.wall, record.direction.encode(),
+                                      record.raw.rstrip(b"\r\n"))
+
+
+def _parse(line: bytes) -> JournalRecord | None:
+    """Record on a line, or None if the line was only partly written."""
+    fields = line.rstrip(b"\n").split(b"\t", 3)
+    if not line.endswith(b"\n") or len(fields) != 4:
+        return None
+    monotonic, wall, direction, raw = fields
+    return JournalRecord(float(monotonic), float(wall), direction.decode(), raw)
+
+
+class SessionJournal(BaseModel, arbitrary_types_allowed=True):
+    """Writer for a journal directory.
+
+    `record` only appends to an in-memory batch; a background task hands batches to a worker
+    thread every `flush_interval` seconds, so journaling costs the event loop next to nothing.
+    """
+    directory: Path
+    segment_bytes: int = 64 * 1024 * 1024
+    segment_seconds: float = 3600.0
+    flush_interval: float = 0.5
+    time_index_interval: int = 256
+    batch: list[JournalRecord] = []
+    flusher: asyncio.Task | None = None
+    lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
+    segment: int = 0
+    segment_size: int = 0
+    segment_started: float = 0.0
+    index: SegmentIndex = Field(default_factory=SegmentIndex)
+
+    def record(self, direction: Direction, raw: bytes | str):
+        """Journal a raw line."""
+        if isinstance(raw, str):
+            raw = raw.encode()
+        self.batch.append(JournalRecord(time.monotonic(), time.time(), direction, raw))
+        if self.flusher is None:
+            self.flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write out everything recorded so far."""
+        async with self.lock:
+            if self.batch:
+                batch, self.batch = self.batch, []
+                await asyncio.to_thread(self._write, batch)
+
+    async def close(self):
+        """Flush and write the index of the current segment."""
+        if self.flusher is not None:
+            self.flusher.cancel()
+            self.flusher = None
+        await self.flush()
+        async with self.lock:
+            if self.segment:
+                await asyncio.to_thread(self._write_index)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.journal"
+
+    def _start_segment(self, now: float):
+        if self.segment:
+            self._write_index()
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.segment = max((int(p.stem.split("-")[1]) for p in self.directory.glob("segment-*.journal")),
+                               default=0)
+        self.segment += 1
+        self.segment_size = 0
+        self.segment_started = now
+        self.index = SegmentIndex()
+
+    def _write_index(self):
+        self._segment_path(self.segment).with_suffix(".idx").write_text(self.index.model_dump_json())
+
+    def _write(self, batch: list[JournalRecord]):
+        """Append records to the current segment, rolling over as needed (runs in a worker thread)."""
+        chunk = []
+        for record in batch:
+            if (not self.segment or self.segment_size >= self.segment_bytes
+                    or record.monotonic - self.segment_started >= self.segment_seconds):
+                self._append(chunk)
+                chunk = []
+                self._start_segment(record.monotonic)
+            line = _format(record)
+            self.index.add(record, self.segment_size, self.time_index_interval)
+            self.segment_size += len(line)
+            chunk.append(line)
+        self._append(chunk)
+
+    def _append(self, lines: list[bytes]):
+        if lines:
+            with open(self._segment_path(self.segment), "ab") as f:
+                f.write(b"".join(lines))
+
+
+class JournalReader(BaseModel):
+    """Reader for a journal directory."""
+    directory: Path
+    time_index_interval: int = 256
+
+    def segments(self) -> list[Path]:
+        """Segment files in order."""
+        return sorted(self.directory.glob("segment-*.journal"))
+
+    def index(self, segment: Path) -> SegmentIndex:
+        """Index of a segment, rebuilt by scanning it if it is missing or stale."""
+        path = segment.with_suffix(".idx")
+        if path.exists() and path.stat().st_mtime >= segment.stat().st_mtime:
+            return SegmentIndex.model_validate_json(path.read_text())
+        index = SegmentIndex()
+        offset = 0
+        with open(segment, "rb") as f:
+            for line in f:
+                record = _parse(line)
+                if record is None:
+                    # The tail of a segment still being written, or cut short
+                    break
+                index.add(record, offset, self.time_index_interval)
+                offset += len(line)
+        return index
+
+    def read(self, start: float | None = None, end: float | None = None,
+             events: set[str] | None = None, direction: Direction | None = None) -> Iterator[JournalRecord]:
+        """Records between two wall clock times, optionally only the given events or direction."""
+        for segment in self.segments():
+            index = self.index(segment)
+            if index.records == 0:
+                continue
+            if (start is not None and index.end_wall < start) or (end is not None and index.start_wall > end):
+                continue
+            with open(segment, "rb") as f:
+                if events is not None:
+                    offsets = sorted(o for name in events for o in index.events.get(name, ()))
+                    for offset in offsets:
+                        f.seek(offset)
+                        record = _parse(f.readline())
+                        if record is None or (direction is not None and record.direction != direction):
+                            continue
+                        if (start is None or record.wall >= start) and (end is None or record.wall <= end):
+                            yield record
+                    continue
+                if start is not None and index.time:
+                    # Jump to the last sparse index entry before the start
+                    position = bisect.bisect_right(index.time, (start, float("inf"))) - 1
+                    f.seek(index.time[max(position, 0)][1])
+                for line in f:
+                    record = _parse(line)
+                    if record is None:
+                        break
+                    if start is not None and record.wall < start:
+                        continue
+                    if end is not None and record.wall > end:
+                        return
+                    if direction is None or record.direction == direction:
+                        yield record
@@ -0,0 +1,101 @@
+"""Counters and histograms for the Seestar protocol, exposed in the Prometheus text format.
+
+Everything here is plain integer and float arithmetic on the hot paths; formatting only happens
+when the metrics are scraped.
+"""
+import bisect
+import collections
+import math
+from typing import Iterable
+
+from pydantic import BaseModel, Field
+
+RTT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TrafficCounters:
+    """Messages and bytes through a connection; a plain slotted object, as it is bumped for every frame."""
+    __slots__ = ('messages_in', 'messages_out', 'bytes_in', 'bytes_out')
+
+    def __init__(self):
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class Histogram(BaseModel):
+    """Histogram of observed values with fixed bucket upper bounds."""
+    buckets: tuple[float, ...] = RTT_BUCKETS
+    counts: list[int] = []  # per bucket, plus one for values above the last bound
+    sum: float = 0.0
+    count: int = 0
+
+    def model_post_init(self, __context):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float):
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class ClientMetrics(BaseModel):
+    """Instrumentation of one Seestar client."""
+    rtt: dict[str, Histogram] = {}  # by command method
+    command_timeouts: collections.Counter = Field(default_factory=collections.Counter)  # by command method
+    events: collections.Counter = Field(default_factory=collections.Counter)  # by event type
+    parse_errors: collections.Counter = Field(default_factory=collections.Counter)  # by frame kind
+    reconnect_attempts: int = 0
+    reconnects: int = 0
+
+    def observe_rtt(self, method: str, seconds: float):
+        """Record the round trip time of a command."""
+        histogram = self.rtt.get(method)
+        if histogram is None:
+            histogram = self.rtt[method] = Histogram()
+        histogram.observe(seconds)
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _value(value: float) -> str:
+    """Sample value at full precision; `:g` would round large counters to six digits."""
+    if isinstance(value, int):
+        return str(int(value))
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def metric_lines(name: str, kind: str, description: str,
+                 samples: Iterable[tuple[dict[str, str], float]]) -> list[str]:
+    """Exposition lines of a counter or gauge, one sample per label set."""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {_value(value)}" for labels, value in samples)
+    return lines
+
+
+def histogram_lines(name: str, description: str,
+                    histograms: Iterable[tuple[dict[str, str], Histogram]]) -> list[str]:
+    """Exposition lines of histograms, one per label set."""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        cumulative = 0
+        bounds = [f"{bound:g}" for bound in histogram.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_value(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+    return lines
@@ -7,7 +7,7 @@ from smarttel.util import RaDecTuple
 
 class PlanItem(BaseModel):
     """Plan item."""
-    target_ra_dec: RaDecTuple = [0, 0]
+    target_ra_dec: RaDecTuple = RaDecTuple(0, 0)
     target_name: str = ""
     lp_filter: bool = False
     state: str = ""  # "idle"
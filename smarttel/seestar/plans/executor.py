@@ -0,0 +1,305 @@
+"""Client-side execution of Seestar plans."""
+import asyncio
+import contextlib
+import datetime
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel
+
+from smarttel.seestar.client import CommandTimeoutError, ConnectionLostError, ConnectionState, SeestarClient
+from smarttel.seestar.commands.common import BaseCommand
+from smarttel.seestar.commands.parameterized import IscopeStartStack, IscopeStartView, IscopeStopView, StopStage
+from smarttel.seestar.events import AutoGotoEvent, StackErrorEvent
+from smarttel.seestar.plans import Plan, PlanItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_DIR = Path.home() / ".smarttel" / "plans"
+
+ItemState = Literal['pending', 'goto', 'stacking', 'complete', 'failed', 'missed', 'skipped']
+FINAL_STATES = frozenset({'complete', 'failed', 'missed', 'skipped'})
+
+
+class PlanStepError(Exception):
+    """A step of a plan item failed on the Seestar."""
+
+
+class ItemProgress(BaseModel):
+    """Progress of one plan item."""
+    state: ItemState = 'pending'
+    start: float  # wall clock the item is scheduled to start
+    end: float  # wall clock the item is scheduled to end
+    started: float | None = None  # wall clock stacking actually started
+    finished: float | None = None
+    stacked: bool = False  # whether stacking ever started, so a retry keeps the frames
+    attempts: int = 0
+    error: str | None = None
+
+
+class PlanRun(BaseModel):
+    """A plan placed in time, with the progress through its items."""
+    plan: Plan
+    items: list[ItemProgress]
+    cancelled: bool = False
+    error: str | None = None  # the last failure outside of the items, such as stopping between them
+
+    @classmethod
+    def schedule(cls, plan: Plan, now: float | None = None) -> 'PlanRun':
+        """Place a plan in time.
+
+        `start_min` counts minutes from local midnight. The first item is placed within 12 hours
+        of now, and every later item on or after the one before it, so plans may run past midnight.
+        """
+        now = time.time() if now is None else now
+        midnight = datetime.datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        items = []
+        previous = None
+        for item in plan.items:
+            start = (midnight + datetime.timedelta(minutes=item.start_min)).timestamp()
+            if previous is None:
+                if start - now > 12 * 3600:
+                    start -= 24 * 3600
+                elif now - start > 12 * 3600:
+                    start += 24 * 3600
+            else:
+                while start < previous:
+                    start += 24 * 3600
+            previous = start
+            items.append(ItemProgress(start=start, end=start + 60 * item.duration_min))
+        return cls(plan=plan, items=items)
+
+    @property
+    def finished(self) -> bool:
+        """Whether there is nothing left to run."""
+        return self.cancelled or all(item.state in FINAL_STATES for item in self.items)
+
+
+class PlanExecutor(BaseModel, arbitrary_types_allowed=True):
+    """Runs a plan on a Seestar: for every item, goto the target, stack until the item ends, then stop.
+
+    Each step waits for the `AutoGoto` and `Stack` events that end it rather than polling. A failed
+    step is retried while the item's time lasts, up to `max_attempts`, after which the plan moves
+    on. Progress is saved after every step, so a restarted executor resumes the plan where it was.
+    """
+    client: SeestarClient
+    path: Path | None = None  # where progress is saved, if anywhere
+    run: PlanRun | None = None
+    goto_timeout: float = 300.0  # seconds for a goto, plate solve included
+    stack_start_timeout: float = 60.0  # seconds for the first Stack event after starting to stack
+    max_attempts: int = 3
+    abandon_drop_ratio: float | None = None  # end an item early once this share of the recent frames is dropped
+    stop_pending: bool = False  # stacking still running from the previous item
+    task: asyncio.Task | None = None
+
+    @classmethod
+    def load(cls, client: SeestarClient, path: Path, **kwargs) -> 'PlanExecutor':
+        """Executor with the progress saved at `path`, if there is any."""
+        run = PlanRun.model_validate_json(path.read_text()) if path.exists() else None
+        return cls(client=client, path=path, run=run, **kwargs)
+
+    def save(self):
+        """Write the progress out, replacing the previous file atomically."""
+        if self.path is None or self.run is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(self.run.model_dump_json(by_alias=True, indent=2))
+        os.replace(temporary, self.path)
+
+    @property
+    def running(self) -> bool:
+        """Whether a plan is being executed."""
+        return self.task is not None and not self.task.done()
+
+    def start(self, plan: Plan) -> PlanRun:
+        """Start executing a plan in the background."""
+        if self.running:
+            raise RuntimeError("A plan is already running")
+        self.run = PlanRun.schedule(plan)
+        self.save()
+        self.task = asyncio.create_task(self.execute())
+        return self.run
+
+    def resume(self) -> bool:
+        """Carry on with saved progress in the background, if there is something left to run."""
+        if self.running or self.run is None or self.run.finished:
+            return False
+        self.stop_pending = any(progress.state == 'stacking' for progress in self.run.items)
+        self.task = asyncio.create_task(self.execute())
+        return True
+
+    async def cancel(self):
+        """Stop executing the plan, and stacking with it."""
+        if self.run is not None:
+            self.run.cancelled = True
+            self.save()
+        if self.running:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+        if self.client.is_connected and self.run is not None and any(p.state == 'goto' for p in self.run.items):
+            self.stop_pending = False
+            await self._send(IscopeStopView(params={"stage": StopStage.AUTO_GOTO}))
+        await self._stop()
+
+    async def execute(self):
+        """Run the items of the plan that are left, in order.
+
+        An unexpected error ends the plan, failing the items that are left, rather than the task
+        dying unnoticed.
+        """
+        run = self.run
+        try:
+            for index, (item, progress) in enumerate(zip(run.plan.items, run.items)):
+                if progress.state in FINAL_STATES:
+                    continue
+                if item.skip:
+                    progress.state = 'skipped'
+                    self.save()
+                    continue
+                await self._run_item(index, item, progress)
+                self.save()
+            await self._stop_stacking()
+        except Exception as e:
+            logger.exception("Plan %s failed on %s", run.plan.plan_name, self.client, extra={"device": self.client})
+            run.error = repr(e)
+            for progress in run.items:
+                if progress.state not in FINAL_STATES:
+                    progress.state = 'failed'
+                    progress.error = f"Plan ended by {e!r}"
+            self.save()
+            return
+        self.save()
+        logger.info("Plan %s finished on %s", run.plan.plan_name, self.client, extra={"device": self.client})
+
+    async def _run_item(self, index: int, item: PlanItem, progress: ItemProgress):
+        """Go to an item's target and stack until the item ends, retrying failed steps."""
+        wait = progress.start - time.time()
+        if wait > 0:
+            # Not back to back with the previous item, so stop that one now
+            await self._stop_stacking()
+            await asyncio.sleep(wait)
+        while progress.attempts < self.max_attempts:
+            if time.time() >= progress.end:
+                break
+            progress.attempts += 1
+            try:
+                await self._goto(item, progress)
+                if await self._stack(progress):
+                    progress.state = 'complete'
+                    progress.error = None
+                else:
+                    progress.state = 'failed'
+                    progress.error = "Abandoned for dropping too many frames"
+                break
+            except (PlanStepError, CommandTimeoutError, ConnectionLostError) as e:
+                progress.error = str(e)
+                logger.warning("Plan item %d (%s) failed on attempt %d: %s", index, item.target_name,
+                               progress.attempts, e, extra={"device": self.client})
+                self.save()
+                if isinstance(e, ConnectionLostError):
+                    with contextlib.suppress(TimeoutError):
+                        async with asyncio.timeout(max(progress.end - time.time(), 0)):
+                            await self.client.wait_for_state(ConnectionState.CONNECTED)
+        if progress.state not in FINAL_STATES:
+            progress.state = 'missed' if progress.error is None else 'failed'
+        progress.finished = time.time()
+
+    async def _goto(self, item: PlanItem, progress: ItemProgress):
+        """Go to the target, waiting for `AutoGoto` to complete."""
+        progress.state = 'goto'
+        self.save()
+        start_view = IscopeStartView(params={
+            "mode": "star",
+            "target_ra_dec": list(item.target_ra_dec),
+            "target_name": item.target_name,
+            "lp_filter": item.lp_filter,
+        })
+        # Straight from the previous item's stacking to this one's goto, in a single write
+        commands = [start_view]
+        if self.stop_pending:
+            commands.insert(0, IscopeStopView(params={"stage": StopStage.STACK}))
+        target = item.target_name or item.target_ra_dec
+        async with self.client.subscribe(AutoGotoEvent) as events:
+            await self._send(*commands)
+            self.stop_pending = False
+            try:
+                async with asyncio.timeout(min(self.goto_timeout, progress.end - time.time())):
+                    async for event in events:
+                        if event.state == 'complete':
+                            return
+                        if event.state in ('fail', 'cancel'):
+                            raise PlanStepError(f"Goto to {target} ended with {event.state}")
+            except TimeoutError:
+                raise PlanStepError(f"Goto to {target} did not complete in time") from None
+        # The events stop when the client disconnects
+        raise ConnectionLostError(f"Lost connection to {self.client} during the goto to {target}")
+
+    async def _stack(self, progress: ItemProgress) -> bool:
+        """Stack until the item ends, failing if stacking doesn't start, stops on its own or the connection drops.
+
+        Returns False if stacking was abandoned for dropping too many frames.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + progress.end - time.time()
+        async with self.client.subscribe(StackErrorEvent, maxsize=1000) as events:
+            await self._send(IscopeStartStack(params={"restart": not progress.stacked}))
+            self.stop_pending = True
+            progress.state = 'stacking'
+            progress.stacked = True
+            progress.started = progress.started or time.time()
+            self.save()
+            stacking = False
+            try:
+                async with asyncio.timeout_at(min(end, loop.time() + self.stack_start_timeout)) as timeout:
+                    async for event in events:
+                        if not stacking:
+                            stacking = True
+                            timeout.reschedule(end)
+                        if event.state == 'fail':
+                            raise PlanStepError(f"Stacking failed: {event.error or event.code}")
+                        if event.state in ('cancel', 'complete'):
+                            self.stop_pending = False
+                            raise PlanStepError(f"Stacking ended on the Seestar with {event.state}")
+                        if event.state == 'frame_complete' and self._drop_ratio_too_high():
+                            logger.warning("Abandoning %s: %.0f%% of recent frames dropped", self.client,
+                                           100 * self.client.stacking.drop_ratio(), extra={"device": self.client})
+                            return False
+            except TimeoutError:
+                if not stacking and loop.time() < end:
+                    raise PlanStepError("Stacking did not start in time") from None
+                return True
+        # The events stop when the client disconnects
+        raise ConnectionLostError(f"Lost connection to {self.client} while stacking")
+
+    def _drop_ratio_too_high(self) -> bool:
+        tracker = self.client.stacking
+        return (self.abandon_drop_ratio is not None and len(tracker.recent) >= tracker.window
+                and tracker.drop_ratio() > self.abandon_drop_ratio)
+
+    async def _send(self, *commands: BaseCommand):
+        """Send commands in one write, raising if the Seestar refuses any of them."""
+        for command, response in zip(commands, await self.client.send_batch(list(commands))):
+            if response is None:
+                raise ConnectionLostError(f"Not connected to {self.client}")
+            if response.code != 0:
+                raise PlanStepError(f"{command.method} failed with code {response.code}")
+
+    async def _stop(self):
+        """Stop stacking left running by the last item."""
+        if self.stop_pending and self.client.is_connected:
+            self.stop_pending = False
+            await self._send(IscopeStopView(params={"stage": StopStage.STACK}))
+
+    async def _stop_stacking(self):
+        """Stop stacking between items, recording a failure on the run rather than ending the plan."""
+        try:
+            await self._stop()
+        except (PlanStepError, CommandTimeoutError, ConnectionLostError) as e:
+            self.run.error = str(e)
+            logger.warning("Failed to stop stacking on %s: %s", self.client, e, extra={"device": self.client})
+            self.save()
@@ -0,0 +1,118 @@
+"""On-disk registry of the Seestars seen so far."""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.commands.discovery import device_serial_number, discover
+from smarttel.seestar.commands.simple import GetTime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = Path.home() / ".smarttel" / "devices.json"
+
+
+class RegisteredDevice(BaseModel):
+    """Seestar seen before, keyed by its serial number."""
+    key: str
+    address: str
+    port: int = 4700
+    model: str | None = None
+    last_seen: float = 0.0  # wall clock
+    discovery: dict = {}  # last discovery reply
+    latency: float | None = Field(default=None, exclude=True)  # seconds, None if not reachable on last probe
+
+    @property
+    def reachable(self) -> bool:
+        """Whether the Seestar answered the last probe."""
+        return self.latency is not None
+
+    def as_discovered(self) -> dict:
+        """The device in the shape `discover` yields."""
+        return {'address': self.address, 'data': self.discovery}
+
+
+class DeviceRegistry(BaseModel):
+    """Seestars seen before, persisted as JSON, that can be probed for liveness all at once."""
+    path: Path = DEFAULT_REGISTRY_PATH
+    devices: dict[str, RegisteredDevice] = {}
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_REGISTRY_PATH) -> 'DeviceRegistry':
+        """Load the registry, or start an empty one if there is none yet."""
+        if not path.exists():
+            return cls(path=path)
+        try:
+            devices = json.loads(path.read_text())
+            return cls(path=path, devices={key: RegisteredDevice(key=key, **device) for key, device in devices.items()})
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable device registry %s: %s", path, e)
+            return cls(path=path)
+
+    def save(self):
+        """Write the registry out, replacing the previous file atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        devices = {key: device.model_dump(exclude={'key'}) for key, device in self.devices.items()}
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(devices, indent=2))
+        os.replace(temporary, self.path)
+
+    def update(self, discovered: dict) -> RegisteredDevice:
+        """Record a device yielded by `discover`."""
+        reply = discovered.get('data', {})
+        result = reply.get('result') if isinstance(reply.get('result'), dict) else {}
+        key = device_serial_number(discovered) or discovered['address']
+        device = self.devices.get(key)
+        if device is None:
+            device = self.devices[key] = RegisteredDevice(key=key, address=discovered['address'])
+        device.address = discovered['address']
+        device.model = result.get('product_model') or result.get('model') or device.model
+        device.last_seen = time.time()
+        device.discovery = reply
+        return device
+
+    async def refresh(self, timeout: float = 3.0) -> list[RegisteredDevice]:
+        """Record every Seestar answering discovery, returning them."""
+        found = [self.update(device) async for device in discover(timeout, addresses=self.addresses())]
+        if found:
+            self.save()
+        return found
+
+    def addresses(self) -> list[str]:
+        """Last known addresses, to ask directly as well as by broadcast."""
+        return sorted({device.address for device in self.devices.values()})
+
+    async def probe(self, timeout: float = 1.0) -> list[RegisteredDevice]:
+        """Check every known Seestar at once, returning the reachable ones fastest first."""
+        await asyncio.gather(*(self._probe(device, timeout) for device in self.devices.values()))
+        return self.reachable()
+
+    def reachable(self) -> list[RegisteredDevice]:
+        """Seestars that answered the last probe, fastest first."""
+        return sorted((device for device in self.devices.values() if device.reachable), key=lambda d: d.latency)
+
+    @staticmethod
+    async def _probe(device: RegisteredDevice, timeout: float):
+        """Time a connect and a `GetTime` round trip to a Seestar, clearing its latency if it doesn't answer."""
+        device.latency = None
+        writer = None
+        try:
+            async with asyncio.timeout(timeout):
+                started = time.monotonic()
+                reader, writer = await asyncio.open_connection(device.address, device.port)
+                writer.write((GetTime(id=1).model_dump_json() + "\n").encode())
+                while True:
+                    # Skip the events the Seestar sends in the meantime
+                    response = json.loads(await reader.readuntil(b"\n"))
+                    if response.get("id") == 1:
+                        break
+                device.latency = time.monotonic() - started
+        except (OSError, TimeoutError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            if writer is not None:
+                writer.close()
@@ -0,0 +1,146 @@
+"""Replay recorded Seestar sessions through `SeestarClient`."""
+import asyncio
+import bisect
+import json
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from smarttel.seestar.client import SeestarClient
+from smarttel.seestar.connection import SeestarConnection, frame_kind
+from smarttel.seestar.journal import Direction, JournalReader
+from smarttel.seestar.metrics import TrafficCounters
+
+_TIMESTAMP_RE = re.compile(rb'"Timestamp"\s*:\s*"([0-9.]+)"')
+
+
+class RecordedLine(NamedTuple):
+    """Line of a recording, `time` in seconds from the start of the recording (None if unknown)."""
+    time: float | None
+    direction: Direction
+    raw: bytes
+
+
+def load_recording(path: Path) -> list[RecordedLine]:
+    """Load a journal directory or a plain NDJSON capture."""
+    if path.is_dir():
+        records = list(JournalReader(directory=path).read())
+        start = records[0].monotonic if records else 0.0
+        return [RecordedLine(record.monotonic - start, record.direction, record.raw) for record in records]
+
+    # A plain capture only has the Seestar's own timestamps, which count seconds since it booted
+    lines = []
+    start = None
+    with open(path, "rb") as f:
+        for raw in f:
+            raw = raw.rstrip(b"\r\n")
+            if not raw:
+                continue
+            direction = 'i' if frame_kind(raw) is not None else 'o'
+            recorded = None
+            if match := _TIMESTAMP_RE.search(raw):
+                recorded = float(match.group(1))
+                start = recorded if start is None else start
+                recorded -= start
+            lines.append(RecordedLine(recorded, direction, raw))
+    return lines
+
+
+class ReplayConnection(SeestarConnection):
+    """Stand-in connection playing back a recording.
+
+    Events are played back at `speed` times real time (None for as fast as possible). Recorded
+    responses are not played back by themselves: each command the client writes is answered with
+    the recorded response to the same method closest before the playback position, with its id
+    rewritten to the id of the command.
+    """
+    host: str = "replay"
+    port: int = 0
+    recording: list[RecordedLine] = []
+    speed: float | None = 1.0
+    frames: asyncio.PriorityQueue | None = None  # (priority, sequence, frame): replies, events, end
+    sequence: int = 0
+    player: asyncio.Task | None = None
+    position: float = 0.0
+    responses: dict[str, list[tuple[float, dict]]] = {}
+
+    def model_post_init(self, __context):
+        for line in self.recording:
+            if line.direction == 'i' and frame_kind(line.raw) == 'response':
+                response = json.loads(line.raw)
+                self.responses.setdefault(response.get("method", ""), []).append((line.time or 0.0, response))
+
+    async def open(self):
+        """Start playing back."""
+        self.frames = asyncio.PriorityQueue()
+        self.traffic = TrafficCounters()
+        self.player = asyncio.create_task(self._play())
+
+    async def close(self):
+        """Stop playing back."""
+        if self.player is not None:
+            self.player.cancel()
+            self.player = None
+
+    async def _play(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for line in self.recording:
+            if line.direction != 'i' or frame_kind(line.raw) != 'event':
+                continue
+            if line.time is not None:
+                if self.speed is not None:
+                    delay = started + line.time / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                self.position = line.time
+            self._put(1, line.raw)
+            # Let the client keep up, and get its commands in, even when playing as fast as possible
+            await asyncio.sleep(0)
+        self._put(2, None)
+
+    def _put(self, priority: int, frame: bytes | None):
+        self.sequence += 1
+        self.frames.put_nowait((priority, self.sequence, frame))
+
+    async def write(self, data: str):
+        """Answer a command from the recording."""
+        command = json.loads(data)
+        method = command.get("method", "")
+        recorded = self.responses.get(method)
+        if recorded:
+            index = max(bisect.bisect_right(recorded, self.position, key=lambda r: r[0]) - 1, 0)
+            response = {**recorded[index][1], "id": command.get("id")}
+        else:
+            response = {"jsonrpc": "2.0", "Timestamp": None, "method": method, "code": 103,
+                        "error": "method not in recording", "result": None, "id": command.get("id")}
+        self.traffic.messages_out += 1
+        self.traffic.bytes_out += len(data) + 1
+        self._put(0, json.dumps(response).encode())
+
+    async def write_many(self, messages: list[str]):
+        """Answer several commands from the recording."""
+        for data in messages:
+            await self.write(data)
+
+    async def read(self) -> bytes | None:
+        """Next played back frame, or None once the recording is over."""
+        priority, _, frame = await self.frames.get()
+        if frame is None:
+            # Keep answering anyone else who asks
+            self._put(priority, None)
+        else:
+            self.traffic.messages_in += 1
+            self.traffic.bytes_in += len(frame)
+        return frame
+
+    def __str__(self):
+        return "replay"
+
+
+def replay_client(path: Path, speed: float | None = 1.0, debug: bool = False) -> SeestarClient:
+    """Client wired to a replay of a recording; it disconnects when the recording ends."""
+    client = SeestarClient("replay", 0, debug=debug)
+    client.connection = ReplayConnection(recording=load_recording(path), speed=speed)
+    client.auto_reconnect = False
+    return client
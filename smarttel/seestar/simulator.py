@@ -0,0 +1,398 @@
+"""Simulated Seestar speaking the same newline delimited JSON-RPC as the real scope."""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class SimulatorSettings(BaseModel):
+    """Knobs for the simulated Seestar."""
+    host: str = "0.0.0.0"
+    port: int = 4700
+    discovery_port: int | None = 4720  # None disables the UDP responder
+    serial_number: str = "4ddb0535"
+    model: str = "Seestar S50"
+    latency: float = 0.0  # seconds added to every response
+    jitter: float = 0.0  # up to this many seconds more, so responses may be reordered
+    pi_status_interval: float = 5.0
+    goto_s: float = 5.0
+    exposure_s: float | None = None  # None uses the simulated exposure setting
+    frame_drop_ratio: float = 0.05
+    flood_rate: float = 0.0  # extra events per second on top of the scripted ones
+    disconnect_interval: float | None = None  # mean seconds between forced disconnects
+
+
+class SimulatedScope(BaseModel):
+    """State of the simulated Seestar."""
+    temp: float = 35.0
+    battery_capacity: int = 100
+    charger_status: str = "Discharging"
+    charge_online: bool = False
+    mode: str = "none"
+    view_state: str = "idle"
+    stage: str = ""
+    target_name: str = ""
+    ra_dec: tuple[float, float] = (0.0, 0.0)
+    lp_filter: bool = False
+    tracking: bool = False
+    focuser_position: int = 1580
+    stacked_frame: int = 0
+    dropped_frame: int = 0
+    exp_ms: int = 10000
+    gain: int = 80
+
+
+class SeestarSimulator(BaseModel, arbitrary_types_allowed=True):
+    """Simulated Seestar TCP server, with a UDP discovery responder."""
+    settings: SimulatorSettings = SimulatorSettings()
+    scope: SimulatedScope = SimulatedScope()
+    server: asyncio.Server | None = None
+    discovery: asyncio.DatagramTransport | None = None
+    writers: list[asyncio.StreamWriter] = []
+    tasks: list[asyncio.Task] = []
+    activity: asyncio.Task | None = None  # running goto or stack
+    started: float = Field(default_factory=time.monotonic)
+
+    @property
+    def port(self) -> int:
+        """Port the simulator listens on (useful when started on port 0)."""
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self):
+        """Start listening."""
+        self.server = await asyncio.start_server(self._handle_connection, self.settings.host, self.settings.port)
+        if self.settings.discovery_port is not None:
+            self.discovery, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _DiscoveryProtocol(self), local_addr=(self.settings.host, self.settings.discovery_port),
+                allow_broadcast=True)
+        self.tasks.append(asyncio.create_task(self._pi_status()))
+        if self.settings.flood_rate > 0:
+            self.tasks.append(asyncio.create_task(self._flood()))
+
+    async def stop(self):
+        """Stop listening and drop every connection."""
+        for task in self.tasks + ([self.activity] if self.activity else []):
+            task.cancel()
+        self.tasks = []
+        self.activity = None
+        for writer in tuple(self.writers):
+            writer.close()
+        if self.discovery is not None:
+            self.discovery.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def serve_forever(self):
+        """Run until cancelled."""
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    def timestamp(self) -> str:
+        """Seestar style timestamp: seconds since boot."""
+        return f"{time.monotonic() - self.started:.6f}"
+
+    def emit(self, event: str, **fields):
+        """Send an event to every connected client."""
+        line = (json.dumps({"Event": event, "Timestamp": self.timestamp(), **fields}) + "\r\n").encode()
+        for writer in self.writers:
+            if not writer.is_closing():
+                writer.write(line)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client."""
+        self.writers.append(writer)
+        dropper = None
+        if self.settings.disconnect_interval:
+            dropper = asyncio.create_task(self._drop_later(writer))
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                # Commands run in the order they arrive; only their responses are delayed
+                asyncio.create_task(self._reply(writer, self._respond(message)))
+        except ConnectionError:
+            pass
+        finally:
+            if dropper is not None:
+                dropper.cancel()
+            self.writers.remove(writer)
+            writer.close()
+
+    async def _drop_later(self, writer: asyncio.StreamWriter):
+        """Drop a connection after a random time, like flaky Wi-Fi."""
+        await asyncio.sleep(random.expovariate(1 / self.settings.disconnect_interval))
+        writer.transport.abort()
+
+    def _respond(self, message: dict) -> dict:
+        """Run a command, returning its response."""
+        method = message.get("method", "")
+        response = {"jsonrpc": "2.0", "Timestamp": self.timestamp(), "method": method, "id": message.get("id")}
+        handler = getattr(self, f"_method_{method}", None)
+        if handler is None:
+            response.update(code=103, error="method not found", result=None)
+        else:
+            response.update(code=0, result=handler(message.get("params")))
+        return response
+
+    async def _reply(self, writer: asyncio.StreamWriter, response: dict):
+        """Send a response after the configured latency."""
+        delay = self.settings.latency + random.uniform(0, self.settings.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + "\r\n").encode())
+
+    def _start_activity(self, coro):
+        """Run a goto or stack, replacing whatever was running."""
+        if self.activity is not None:
+            self.activity.cancel()
+        self.activity = asyncio.create_task(coro)
+
+    async def _pi_status(self):
+        """Periodic PiStatus events with a slowly draining battery."""
+        while True:
+            await asyncio.sleep(self.settings.pi_status_interval)
+            self.scope.temp = round(self.scope.temp + random.uniform(-0.3, 0.3), 1)
+            if random.random() < 0.1:
+                self.scope.battery_capacity = max(0, self.scope.battery_capacity - 1)
+            self.emit("PiStatus", temp=self.scope.temp, battery_capacity=self.scope.battery_capacity,
+                      charger_status=self.scope.charger_status, charge_online=self.scope.charge_online)
+
+    async def _flood(self):
+        """Extra events at `flood_rate` per second, sent in small bursts so high rates are reachable."""
+        tick = 0.01
+        owed = 0.0
+        while True:
+            owed += self.settings.flood_rate * tick
+            while owed >= 1:
+                owed -= 1
+                self.emit("Exposure", state="working", lapse_ms=0, exp_ms=self.scope.exp_ms, route=[])
+            await asyncio.sleep(tick)
+
+    async def _goto(self, target_name: str, ra_dec: tuple[float, float]):
+        """Slew to a target, then plate solve and annotate it."""
+        self.scope.mode, self.scope.stage, self.scope.view_state = "star", "AutoGoto", "working"
+        self.scope.target_name = target_name
+        self.emit("AutoGoto", state="start", lapse_ms=0, route=["View"])
+        steps = 5
+        for step in range(steps):
+            await asyncio.sleep(self.settings.goto_s / steps)
+            self.emit("ScopeGoto", state="working", lapse_ms=int(1000 * self.settings.goto_s * step / steps),
+                      cur_ra_dec=list(ra_dec), dist_deg=round(30.0 * (steps - step - 1) / steps, 2), route=["View"])
+        self.scope.ra_dec = ra_dec
+        self.scope.tracking = True
+        self.emit("ScopeGoto", state="complete", lapse_ms=int(1000 * self.settings.goto_s), cur_ra_dec=list(ra_dec),
+                  dist_deg=0.0, route=["View"])
+        self.emit("PlateSolve", state="complete", page="preview", result={"star_number": 120, "duration_ms": 900})
+        self.emit("AutoGoto", state="complete", lapse_ms=int(1000 * self.settings.goto_s), count=1, route=["View"])
+        self.emit("Annotate", page="preview", state="complete", result=self._annotate_result())
+        self.scope.stage = "ContinuousExposure"
+
+    async def _stack(self):
+        """Take and stack frames until stopped."""
+        self.scope.stage = "Stack"
+        self.emit("Stack", state="start", lapse_ms=0, route=["View"])
+        while True:
+            exposure = self.settings.exposure_s if self.settings.exposure_s is not None else self.scope.exp_ms / 1000
+            self.emit("Exposure", state="start", lapse_ms=0, exp_ms=self.scope.exp_ms, route=["View"])
+            await asyncio.sleep(exposure)
+            self.emit("Exposure", state="downloading", lapse_ms=int(exposure * 1000), exp_ms=self.scope.exp_ms,
+                      route=["View"])
+            errcode = 0
+            if random.random() < self.settings.frame_drop_ratio:
+                self.scope.dropped_frame += 1
+                errcode = random.choice([1, 2, 262])
+            else:
+                self.scope.stacked_frame += 1
+            self.emit("Stack", state="frame_complete", lapse_ms=int(exposure * 1000), frame_errcode=errcode,
+                      stacked_frame=self.scope.stacked_frame, dropped_frame=self.scope.dropped_frame,
+                      can_annotate=True, frame_type="light",
+                      total_frame=self.scope.stacked_frame + self.scope.dropped_frame, route=["View"])
+
+    def _annotate_result(self) -> dict[str, Any]:
+        return {
+            "image_size": [1080, 1920],
+            "annotations": [{"type": "ngc", "pixelx": 540.0, "pixely": 960.0, "name": self.scope.target_name,
+                             "names": [self.scope.target_name]}],
+            "image_id": random.randint(1, 10000),
+        }
+
+    # Methods, named after the JSON-RPC method they answer
+
+    def _method_pi_get_time(self, params):
+        now = datetime.now()
+        return {"year": now.year, "mon": now.month, "day": now.day, "hour": now.hour, "min": now.minute,
+                "sec": now.second, "time_zone": "Etc/UTC"}
+
+    def _method_get_device_state(self, params):
+        return {
+            "device": {"name": self.settings.model, "firmware_ver_int": 2427, "firmware_ver_string": "4.27",
+                       "sn": self.settings.serial_number, "product_model": self.settings.model},
+            "setting": self._method_get_setting(None),
+            "pi_status": {"temp": self.scope.temp, "charger_status": self.scope.charger_status,
+                          "charge_online": self.scope.charge_online,
+                          "battery_capacity": self.scope.battery_capacity},
+            "mount": {"tracking": self.scope.tracking},
+        }
+
+    def _method_get_view_state(self, params):
+        view = {"state": self.scope.view_state, "lapse_ms": 0, "mode": self.scope.mode, "cam_id": 0,
+                "target_name": self.scope.target_name, "lp_filter": self.scope.lp_filter, "gain": self.scope.gain}
+        if self.scope.stage:
+            view["stage"] = self.scope.stage
+        if self.scope.stage == "Stack":
+            view["Stack"] = {"stacked_frame": self.scope.stacked_frame, "dropped_frame": self.scope.dropped_frame}
+        return {"View": view}
+
+    def _method_get_setting(self, params):
+        return {"exp_ms": {"stack_l": self.scope.exp_ms, "continuous": 500}, "ae_bri_percent": 50,
+                "stack_dither": {"pix": 50, "interval": 5, "enable": True}, "save_discrete_frame": False,
+                "save_discrete_ok_frame": True, "auto_3ppa_calib": True, "rtsp_roi_index": 0}
+
+    def _method_get_stack_setting(self, params):
+        return {"save_discrete_ok_frame": True, "save_discrete_frame": False}
+
+    def _method_get_stack_info(self, params):
+        return {"width": 1080, "height": 1920, "stacked_frame": self.scope.stacked_frame,
+                "dropped_frame": self.scope.dropped_frame}
+
+    def _method_get_camera_info(self, params):
+        return {"chip_size": [1920, 1080], "bins": [1, 2], "pixel_size_um": 2.9, "unity_gain": 0,
+                "has_cooler": False, "is_color": True, "is_usb3_host": False, "has_hpc": False,
+                "debayer_pattern": "GR"}
+
+    def _method_get_camera_state(self, params):
+        return {"state": "working" if self.scope.stage else "idle", "name": "IMX462", "path": "/dev/video0"}
+
+    def _method_get_disk_volume(self, params):
+        return {"totalMB": 51200, "freeMB": 40960}
+
+    def _method_get_focuser_position(self, params):
+        return self.scope.focuser_position
+
+    def _method_get_wheel_position(self, params):
+        return 2 if self.scope.lp_filter else 1
+
+    def _method_get_wheel_state(self, params):
+        return {"state": "idle", "position": self._method_get_wheel_position(None)}
+
+    def _method_get_wheel_setting(self, params):
+        return {"names": ["Dark", "IR cut", "LP"]}
+
+    def _method_get_user_location(self, params):
+        return {"lon": -71.06, "lat": 42.36, "force": False}
+
+    def _method_get_annotated_result(self, params):
+        return self._annotate_result()
+
+    def _method_get_solve_result(self, params):
+        return {"ra_dec": list(self.scope.ra_dec), "fov": [0.71, 1.27], "focal_len": 252.0, "angle": -4.1,
+                "image_id": 1, "star_number": 120, "duration_ms": 900}
+
+    _method_get_last_solve_result = _method_get_solve_result
+
+    def _method_scope_get_equ_coord(self, params):
+        return {"ra": self.scope.ra_dec[0], "dec": self.scope.ra_dec[1]}
+
+    _method_scope_get_ra_dec = _method_scope_get_equ_coord
+
+    def _method_scope_park(self, params):
+        if self.activity is not None:
+            self.activity.cancel()
+        self.scope.tracking = False
+        self.emit("ScopeHome", state="complete", lapse_ms=0, close=True)
+        return 0
+
+    def _method_scope_set_track_state(self, params):
+        self.scope.tracking = bool(params)
+        self.emit("ScopeTrack", state="on" if self.scope.tracking else "off", tracking=self.scope.tracking,
+                  manual=False, route=[])
+        return 0
+
+    def _method_start_auto_focuse(self, params):
+        self.emit("AutoFocus", state="start", lapse_ms=0, route=["View"])
+        return 0
+
+    def _method_stop_auto_focuse(self, params):
+        self.emit("AutoFocus", state="cancel", lapse_ms=0, route=["View"])
+        return 0
+
+    def _method_start_solve(self, params):
+        self.emit("PlateSolve", state="solving", page="preview")
+        return 0
+
+    def _method_set_control_value(self, params):
+        if isinstance(params, list) and len(params) == 2 and params[0] == "gain":
+            self.scope.gain = int(params[1])
+        return 0
+
+    def _method_set_setting(self, params):
+        if isinstance(params, dict) and "exp_ms" in params:
+            self.scope.exp_ms = params["exp_ms"].get("stack_l", self.scope.exp_ms)
+        self.emit("Setting", rtsp_roi_index=0)
+        return 0
+
+    def _method_iscope_start_view(self, params):
+        params = params or {}
+        ra_dec = tuple(params.get("target_ra_dec") or self.scope.ra_dec)
+        self.scope.lp_filter = bool(params.get("lp_filter", False))
+        self._start_activity(self._goto(params.get("target_name", ""), ra_dec))
+        return 0
+
+    def _method_iscope_start_stack(self, params):
+        if (params or {}).get("restart", True):
+            self.scope.stacked_frame = 0
+            self.scope.dropped_frame = 0
+        self._start_activity(self._stack())
+        return 0
+
+    def _method_iscope_stop_view(self, params):
+        stage = (params or {}).get("stage")
+        if self.activity is not None:
+            self.activity.cancel()
+            self.activity = None
+        if stage == "Stack" or self.scope.stage == "Stack":
+            self.emit("Stack", state="cancel", lapse_ms=0, stacked_frame=self.scope.stacked_frame,
+                      dropped_frame=self.scope.dropped_frame, route=["View"])
+        self.scope.stage = "ContinuousExposure" if stage == "Stack" else ""
+        if stage != "Stack":
+            self.scope.view_state = "idle"
+            self.emit("View", state="cancel", lapse_ms=0, mode=self.scope.mode, route=[])
+        return 0
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Answer `scan_iscope` broadcasts like a Seestar does."""
+
+    def __init__(self, simulator: SeestarSimulator):
+        self.simulator = simulator
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            request = json.loads(data)
+        except json.JSONDecodeError:
+            return
+        if request.get("method") != "scan_iscope":
+            return
+        response = {
+            "jsonrpc": "2.0", "Timestamp": self.simulator.timestamp(), "method": "scan_iscope", "code": 0,
+            "id": request.get("id"),
+            "result": {"model": self.simulator.settings.model, "sn": self.simulator.settings.serial_number,
+                       "product_model": self.simulator.settings.model, "is_verified": True,
+                       "tcp_client_num": len(self.simulator.writers)},
+        }
+        self.transport.sendto((json.dumps(response) + "\r\n").encode(), addr)
@@ -0,0 +1,164 @@
+"""Live statistics of stacking, derived from the `Stack`, `Exposure` and `BatchStack` events."""
+import collections
+import re
+import time
+
+from pydantic import BaseModel, Field
+
+from smarttel.seestar.events import BatchStackEvent, StackErrorEvent
+
+_EXP_MS_RE = re.compile(r'"exp_ms"\s*:\s*([-+.\deE]+)')
+_EXP_MS_BYTES_RE = re.compile(rb'"exp_ms"\s*:\s*([-+.\deE]+)')
+
+
+def exposure_ms(raw: str | bytes) -> float | None:
+    """Get the `exp_ms` of a raw `Exposure` event without parsing the whole message."""
+    match = (_EXP_MS_RE if isinstance(raw, str) else _EXP_MS_BYTES_RE).search(raw)
+    return float(match.group(1)) if match else None
+
+
+class StackingProgress(BaseModel):
+    """Snapshot of the current stacking session."""
+    active: bool = False
+    exposure: float | None = None  # seconds per frame
+    stacked_frames: int = 0
+    dropped_frames: int = 0
+    frame_rate: float | None = None  # accepted frames per minute, over the rolling window
+    drop_ratio: float | None = None  # over the rolling window
+    integration_time: float = 0.0  # seconds of accepted exposure
+    errcodes: dict[int, int] = {}  # dropped frames by `frame_errcode`
+    target_frames: int | None = None
+    target_integration: float | None = None  # seconds
+    eta: float | None = None  # seconds until the targets are reached, at the current frame rate
+    batch_percent: float | None = None  # of the last batch stack
+    batch_remaining: float | None = None  # seconds
+
+
+class StackingTracker(BaseModel):
+    """Incremental stacking statistics; every event is handled in constant time.
+
+    Frame rate and drop ratio cover the last `window` frames, so a spike in dropped frames shows
+    up quickly rather than being averaged away over the whole session.
+    """
+    window: int = 20  # frames
+    active: bool = False
+    exposure: float | None = None
+    stacked_frames: int = 0
+    dropped_frames: int = 0
+    integration_time: float = 0.0
+    errcodes: collections.Counter = Field(default_factory=collections.Counter)
+    recent: collections.deque = Field(default_factory=collections.deque)  # (monotonic time, accepted) per frame
+    recent_accepted: int = 0
+    window_start: float | None = None  # monotonic time the rolling window starts
+    target_frames: int | None = None
+    target_integration: float | None = None
+    batch_percent: float | None = None
+    batch_remaining: float | None = None
+
+    def set_target(self, frames: int | None = None, integration: float | None = None):
+        """Set the frame count and/or integration seconds to estimate the time to; None clears them."""
+        self.target_frames = frames
+        self.target_integration = integration
+
+    def _start(self, now: float):
+        self.active = True
+        self.stacked_frames = 0
+        self.dropped_frames = 0
+        self.integration_time = 0.0
+        self.errcodes.clear()
+        self.recent.clear()
+        self.recent_accepted = 0
+        self.window_start = now
+
+    def handle_exposure(self, exp_ms: float | None) -> bool:
+        """Track the exposure of the frames being taken, returning whether it changed."""
+        if not exp_ms or exp_ms / 1000 == self.exposure:
+            return False
+        self.exposure = exp_ms / 1000
+        return True
+
+    def handle_stack(self, event: StackErrorEvent, now: float | None = None):
+        """Account for a stacked or dropped frame, or the start or end of a session."""
+        now = time.monotonic() if now is None else now
+        match event.state:
+            case 'start':
+                self._start(now)
+            case 'frame_complete':
+                # Joined mid-session, or the Seestar started over
+                joined = not self.active or event.stacked_frame < self.stacked_frames
+                if joined:
+                    self._start(now)
+                exposure = self.exposure if self.exposure is not None else event.lapse_ms / 1000
+                # Counted from the Seestar's totals, so frames missed while disconnected still count
+                self.integration_time += (event.stacked_frame - self.stacked_frames) * exposure
+                self.stacked_frames = event.stacked_frame
+                self.dropped_frames = event.dropped_frame
+                accepted = event.frame_errcode == 0
+                if not accepted:
+                    self.errcodes[event.frame_errcode] += 1
+                if joined:
+                    # Only the frames after this one can be timed
+                    return
+                self.recent.append((now, accepted))
+                self.recent_accepted += accepted
+                if len(self.recent) > self.window:
+                    self.window_start, dropped_accepted = self.recent.popleft()
+                    self.recent_accepted -= dropped_accepted
+            case 'complete' | 'cancel' | 'fail':
+                self.active = False
+
+    def handle_batch_stack(self, event: BatchStackEvent):
+        """Track the progress of stacking previously taken frames."""
+        self.batch_percent = 100.0 if event.state == 'complete' else event.percent
+        self.batch_remaining = 0.0 if event.state == 'complete' else event.remaining_sec
+
+    def frame_rate(self) -> float | None:
+        """Accepted frames per second over the rolling window."""
+        if not self.recent or self.window_start is None:
+            return None
+        elapsed = self.recent[-1][0] - self.window_start
+        return self.recent_accepted / elapsed if elapsed > 0 else None
+
+    def drop_ratio(self) -> float | None:
+        """Share of dropped frames over the rolling window."""
+        return 1 - self.recent_accepted / len(self.recent) if self.recent else None
+
+    def eta(self) -> float | None:
+        """Seconds until every target is reached at the current frame rate, if there is one."""
+        rate = self.frame_rate()
+        remaining = []
+        if self.target_frames is not None:
+            remaining.append((self.target_frames - self.stacked_frames, rate))
+        if self.target_integration is not None:
+            exposure_rate = rate * self.exposure if rate is not None and self.exposure is not None else None
+            remaining.append((self.target_integration - self.integration_time, exposure_rate))
+        if not remaining:
+            return None
+        etas = []
+        for left, per_second in remaining:
+            if left <= 0:
+                etas.append(0.0)
+            elif not per_second:
+                return None
+            else:
+                etas.append(left / per_second)
+        return max(etas)
+
+    def progress(self) -> StackingProgress:
+        """Snapshot of the statistics."""
+        rate = self.frame_rate()
+        return StackingProgress(
+            active=self.active,
+            exposure=self.exposure,
+            stacked_frames=self.stacked_frames,
+            dropped_frames=self.dropped_frames,
+            frame_rate=rate * 60 if rate is not None else None,
+            drop_ratio=self.drop_ratio(),
+            integration_time=self.integration_time,
+            errcodes=dict(self.errcodes),
+            target_frames=self.target_frames,
+            target_integration=self.target_integration,
+            eta=self.eta(),
+            batch_percent=self.batch_percent,
+            batch_remaining=self.batch_remaining,
+        )
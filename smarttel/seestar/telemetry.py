@@ -0,0 +1,254 @@
+"""In-memory history of Seestar telemetry, for trending battery drain, temperature and stacking.
+
+Every metric keeps its recent raw samples plus coarser min/max/mean buckets, each in fixed-size
+rings of `array('d')` columns allocated up front, so memory stays flat however long the uptime.
+Recording a sample is a handful of float operations: only the finest buckets see every sample,
+and each coarser level is fed the closed buckets of the one below. Queries slice the columns
+rather than walking samples one by one.
+"""
+import bisect
+import operator
+import time
+from array import array
+
+from pydantic import BaseModel, Field
+
+TELEMETRY_METRICS = ('temp', 'battery_capacity', 'stacked_frame', 'dropped_frame')
+
+RAW_CAPACITY = 3600
+TIERS = ((60.0, 1440), (600.0, 1008), (3600.0, 720))
+"""Bucket seconds and bucket count of the downsampled resolutions: a day, a week and a month."""
+
+
+class _Ring:
+    """Columns of floats with a fixed capacity, overwriting the oldest row when full.
+
+    The first column holds non-decreasing timestamps.
+    """
+    __slots__ = ('capacity', 'columns', 'start', 'length')
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.columns = tuple(array('d', bytes(8 * capacity)) for _ in range(width))
+        self.start = 0
+        self.length = 0
+
+    def append(self, *row: float):
+        index = self.start + self.length
+        if index >= self.capacity:
+            index -= self.capacity
+        if self.length < self.capacity:
+            self.length += 1
+        else:
+            self.start = index + 1 if index + 1 < self.capacity else 0
+        for column, value in zip(self.columns, row):
+            column[index] = value
+
+    def oldest(self) -> float | None:
+        return self.columns[0][self.start] if self.length else None
+
+    def select(self, start: float, end: float) -> tuple[array, ...]:
+        """Rows with timestamps from `start` to `end` inclusive, oldest first."""
+        stop = self.start + self.length
+        if stop <= self.capacity:
+            segments = [(self.start, stop)]
+        else:
+            segments = [(self.start, self.capacity), (0, stop - self.capacity)]
+        times = self.columns[0]
+        selected = tuple(array('d') for _ in self.columns)
+        for low, high in segments:
+            first = bisect.bisect_left(times, start, low, high)
+            last = bisect.bisect_right(times, end, first, high)
+            for result, column in zip(selected, self.columns):
+                result.extend(column[first:last])
+        return selected
+
+
+class _Tier:
+    """Min/max/sum/count buckets of a fixed width, the newest one still open.
+
+    Only the finest tier sees every sample; each closed bucket is folded into the next coarser
+    tier, whose width must be a multiple of this one's.
+    """
+    __slots__ = ('step', 'ring', 'bucket', 'low', 'high', 'total', 'count', 'finer', 'coarser')
+
+    def __init__(self, step: float, capacity: int, finer: '_Tier | None' = None):
+        self.step = step
+        self.ring = _Ring(capacity, 5)
+        self.bucket = float('-inf')
+        self.low = self.high = self.total = 0.0
+        self.count = 0
+        self.finer = finer
+        self.coarser = None
+        if finer is not None:
+            if step % finer.step:
+                raise ValueError(f"Telemetry bucket of {step}s is not a multiple of {finer.step}s")
+            finer.coarser = self
+
+    def add(self, t: float, value: float):
+        """Add a sample."""
+        bucket = t - t % self.step
+        if bucket != self.bucket:
+            self._close()
+            self.bucket = bucket
+            self.low = self.high = self.total = value
+            self.count = 1
+            return
+        if value < self.low:
+            self.low = value
+        elif value > self.high:
+            self.high = value
+        self.total += value
+        self.count += 1
+
+    def merge(self, t: float, low: float, high: float, total: float, count: float):
+        """Add a closed bucket of the finer tier."""
+        bucket = t - t % self.step
+        if bucket != self.bucket:
+            self._close()
+            self.bucket, self.low, self.high, self.total, self.count = bucket, low, high, total, count
+            return
+        if low < self.low:
+            self.low = low
+        if high > self.high:
+            self.high = high
+        self.total += total
+        self.count += count
+
+    def _close(self):
+        if self.count:
+            self.ring.append(self.bucket, self.low, self.high, self.total, self.count)
+            if self.coarser is not None:
+                self.coarser.merge(self.bucket, self.low, self.high, self.total, self.count)
+
+    def pending(self) -> list[list[float]]:
+        """Buckets not in the ring yet, oldest first: the open one, plus what the finer tiers still hold."""
+        buckets = [[self.bucket, self.low, self.high, self.total, self.count]] if self.count else []
+        for t, low, high, total, count in self.finer.pending() if self.finer is not None else ():
+            bucket = t - t % self.step
+            if buckets and buckets[-1][0] == bucket:
+                last = buckets[-1]
+                last[1] = min(last[1], low)
+                last[2] = max(last[2], high)
+                last[3] += total
+                last[4] += count
+            else:
+                buckets.append([bucket, low, high, total, count])
+        return buckets
+
+    def oldest(self) -> float | None:
+        oldest = self.ring.oldest()
+        if oldest is not None:
+            return oldest
+        pending = self.pending()
+        return pending[0][0] if pending else None
+
+    def select(self, start: float, end: float) -> tuple[array, array, array, array]:
+        """Buckets overlapping `start` to `end`, as times, minimums, maximums and means."""
+        if start > float('-inf'):
+            start -= start % self.step  # from the bucket holding `start`
+        columns = self.ring.select(start, end)
+        for bucket in self.pending():
+            if start <= bucket[0] <= end:
+                for column, value in zip(columns, bucket):
+                    column.append(value)
+        times, low, high, total, count = columns
+        return times, low, high, array('d', map(operator.truediv, total, count))
+
+
+class TimeSeries:
+    """Raw samples of one metric plus its downsampled tiers; a plain slotted object, as it is fed on every event."""
+    __slots__ = ('raw', 'tiers', 'finest', 'last')
+
+    def __init__(self, raw_capacity: int = RAW_CAPACITY, tiers: tuple[tuple[float, int], ...] = TIERS):
+        self.raw = _Ring(raw_capacity, 2)
+        finer = None
+        levels = []
+        for step, capacity in tiers:
+            finer = _Tier(step, capacity, finer)
+            levels.append(finer)
+        self.tiers = tuple(levels)
+        self.finest = levels[0] if levels else None
+        self.last = float('-inf')
+
+    def record(self, t: float, value: float):
+        """Add a sample; timestamps going backwards are clamped to the previous one."""
+        if t < self.last:
+            t = self.last
+        self.last = t
+        raw = self.raw
+        # `_Ring.append`, unrolled for the two raw columns
+        index = raw.start + raw.length
+        if index >= raw.capacity:
+            index -= raw.capacity
+        if raw.length < raw.capacity:
+            raw.length += 1
+        else:
+            raw.start = index + 1 if index + 1 < raw.capacity else 0
+        times, values = raw.columns
+        times[index] = t
+        values[index] = value
+        if self.finest is not None:
+            self.finest.add(t, value)
+
+
+class TelemetrySeries(BaseModel):
+    """A metric over a time range, as columns of bucket start times and per-bucket statistics."""
+    metric: str
+    resolution: float  # bucket seconds, 0 for raw samples
+    t: list[float]
+    min: list[float]
+    max: list[float]
+    mean: list[float]
+
+
+class TelemetryStore(BaseModel, arbitrary_types_allowed=True):
+    """Bounded history of a fixed set of metrics, at raw and downsampled resolutions."""
+    metrics: tuple[str, ...] = TELEMETRY_METRICS
+    raw_capacity: int = RAW_CAPACITY
+    tiers: tuple[tuple[float, int], ...] = TIERS
+    series: dict[str, TimeSeries] = Field(default_factory=dict, exclude=True)
+
+    def model_post_init(self, __context):
+        self.series = {metric: TimeSeries(self.raw_capacity, self.tiers) for metric in self.metrics}
+
+    def record(self, metric: str, value: float, t: float | None = None):
+        """Add a sample of a metric, at `t` in `time.time()` seconds, by default now."""
+        self.series[metric].record(time.time() if t is None else t, value)
+
+    def query(self, metric: str, start: float | None = None, end: float | None = None,
+              resolution: float = 0.0) -> TelemetrySeries:
+        """A metric from `start` to `end` (`time.time()` seconds, default everything kept).
+
+        Uses the finest kept resolution at least as coarse as the one asked for, going coarser
+        still if that resolution no longer reaches back to `start`, as far as older history is
+        kept. Raises KeyError for unknown metrics.
+        """
+        series = self.series[metric]
+        start = float('-inf') if start is None else start
+        end = float('inf') if end is None else end
+        levels = [tier for tier in series.tiers if tier.step >= resolution] or list(series.tiers[-1:])
+        if resolution <= 0:
+            levels.insert(0, series.raw)
+        # The finest level complete back to `start`, or else the one complete back furthest
+        reach = [self._reach(level) for level in levels]
+        choice = next((i for i, t in enumerate(reach) if t <= start), None)
+        if choice is None:
+            choice = min(range(len(levels)), key=reach.__getitem__)
+        level = levels[choice]
+        if level is series.raw:
+            times, values = level.select(start, end)
+            values = values.tolist()
+            return TelemetrySeries(metric=metric, resolution=0.0, t=times.tolist(),
+                                   min=values, max=values, mean=values)
+        times, low, high, mean = level.select(start, end)
+        return TelemetrySeries(metric=metric, resolution=level.step, t=times.tolist(),
+                               min=low.tolist(), max=high.tolist(), mean=mean.tolist())
+
+    @staticmethod
+    def _reach(level: _Ring | _Tier) -> float:
+        """Time from which a level holds every sample."""
+        oldest = level.oldest()
+        if oldest is None:
+            return float('inf')
+        return oldest + level.step if isinstance(level, _Tier) else oldest
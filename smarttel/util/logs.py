@@ -0,0 +1,100 @@
+"""Structured logging that keeps formatting and I/O off the event loop.
+
+Log records go onto a queue as they are, and a background thread formats and writes them, so a
+log call on the event loop costs a level check and a queue put, and nothing at all for disabled
+levels. Structured fields are passed with `extra`, e.g.
+
+    logger.debug("Event", extra={"device": self, "payload": frame})
+
+and are only turned into text on the logging thread, so pass values that won't change afterwards
+(raw frames, parsed responses).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+from pydantic import BaseModel
+
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def _text(value) -> str:
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace').rstrip("\r\n")
+    if isinstance(value, BaseModel) and type(value).__str__ is BaseModel.__str__:
+        # Messages as JSON, but things like clients by their own short description
+        return value.model_dump_json()
+    return str(value)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format a record with its `extra` fields, as `key=value` text or as a JSON object per line."""
+
+    def __init__(self, as_json: bool = False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: _text(value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        if record.exc_info:
+            fields['exception'] = self.formatException(record.exc_info)
+        if self.as_json:
+            return json.dumps({"time": record.created, "level": record.levelname, "logger": record.name,
+                               "message": record.getMessage(), **fields})
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+        text = f"{created}.{int(record.msecs):03d} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        return " ".join([text, *(f"{key}={value}" for key, value in fields.items())])
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves all formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def setup_logging(level: str | int = logging.INFO, handler: logging.Handler | None = None,
+                  as_json: bool = False):
+    """Send every log record through a queue to a handler (stderr by default) on a background thread.
+
+    Calling it again replaces the previous setup.
+    """
+    global _listener
+    if handler is None:
+        handler = logging.StreamHandler()
+    if handler.formatter is None:
+        handler.setFormatter(StructuredFormatter(as_json))
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(lambda: _listener.stop())
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(DeferredQueueHandler(records))
+    root.setLevel(level)
+    _listener.start()
+
+
+def logger_levels() -> dict[str, str]:
+    """Effective level of the root logger and of every logger configured so far."""
+    levels = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name in sorted(logging.Logger.manager.loggerDict):
+        logger = logging.getLogger(name)
+        levels[name] = logging.getLevelName(logger.getEffectiveLevel())
+    return levels
+
+
+def set_logger_level(name: str, level: str):
+    """Change the level of a logger at runtime; `root` is the root logger."""
+    if level.upper() not in logging.getLevelNamesMapping():
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger(None if name == "root" else name).setLevel(level.upper())